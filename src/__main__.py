@@ -11,12 +11,15 @@ import pytest
 import shutil
 
 from src.core.api.keyboard.keyboard_api import check_keyboard_state
+from src.core.api.screen.capture import check_capture_backend
 from src.core.util import cleanup
 from src.core.util.app_loader import get_app_test_directory
-from src.core.util.arg_parser import get_core_args
+from src.core.util.arg_parser import PATTERNS_COMMAND, get_core_args
 from src.core.util.json_utils import create_target_json
 from src.core.util.local_web_server import LocalWebServer
 from src.core.util.logger_manager import initialize_logger
+from src.core.util.parallel_runner import run_parallel
+from src.core.util.pattern_build import run_patterns_command
 from src.core.util.path_manager import PathManager
 from src.core.util.system import check_7zip, fix_terminal_encoding, init_tesseract_path, reset_terminal_encoding
 
@@ -26,6 +29,8 @@ logger = logging.getLogger(__name__)
 def main():
     args = get_core_args()
     initialize_logger()
+    if args.application == PATTERNS_COMMAND:
+        exit(run_patterns_command(args.test_path))
     if verify_config(args):
         user_result = None
         if show_control_center():
@@ -35,6 +40,9 @@ def main():
             # parse user_result to extract desired target and parameters,
             # and pass parameters to target
         if user_result is not 'cancel':
+            if args.workers > 1 and PathManager.get_worker_id() is None:
+                initialize_platform(args)
+                exit(run_parallel(args.workers))
             try:
                 target_plugin = get_target(args.application)
                 pytest_args = get_test_params(args.application)
@@ -107,9 +115,11 @@ def get_test_params(target):
 
 
 def verify_config(args):
-    """Checks keyboard state is correct, and that Tesseract and 7zip are installed."""
+    """Checks keyboard state is correct, that Tesseract and 7zip are installed, and that the screen capture backend
+    is supported."""
     try:
-        if not all([check_keyboard_state(args.no_check), init_tesseract_path(), check_7zip()]):
+        if not all([check_keyboard_state(args.no_check), init_tesseract_path(), check_7zip(),
+                    check_capture_backend(args.capture)]):
             exit(1)
     except KeyboardInterrupt:
         exit(1)
@@ -11,6 +11,7 @@ import pytest
 import logging
 from src.core.util.arg_parser import get_core_args
 from src.core.api.os_helpers import OSHelper
+from src.core.api.save_debug_image.save_image import flush_debug_images
 from src.core.util.json_utils import update_run_index, create_run_log
 from src.core.util.test_assert import create_result_object
 from src.core.util.run_report import create_footer
@@ -69,6 +70,7 @@ class BaseTarget:
         """
         self.end_time = time.time()
 
+        flush_debug_images()
         update_run_index(self, True)
         footer = create_footer(self)
         footer.print_report_footer()
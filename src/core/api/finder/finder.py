@@ -5,16 +5,16 @@
 
 import time
 
-import pyautogui
-
 from src.core.api.enums import Color
 from src.core.api.enums import MatchTemplateType
 from src.core.api.errors import FindError
-from src.core.api.finder.image_search import image_find, match_template, image_vanish
+from src.core.api.finder.image_search import image_find, match_template, image_vanish, match_any, image_find_any
+from src.core.api.finder.match_result import MatchResult
 from src.core.api.finder.pattern import Pattern
-from src.core.api.finder.text_search import text_find, text_find_all
+from src.core.api.finder.text_search import text_find, text_find_all, text_wait
 from src.core.api.highlight.screen_highlight import ScreenHighlight, HighlightRectangle
 from src.core.api.location import Location
+from src.core.api.mouse.mouse_controller import Mouse
 from src.core.api.rectangle import Rectangle
 from src.core.api.settings import Settings
 from src.core.util.arg_parser import get_core_args
@@ -61,12 +61,12 @@ def highlight(region=None, seconds=None, color=None, ps=None, location=None, tex
     time.sleep(seconds)
 
 
-def find(ps: Pattern or str, region: Rectangle = None) -> Location or FindError:
+def find(ps: Pattern or str, region: Rectangle = None) -> MatchResult or Location or FindError:
     """Look for a single match of a Pattern or image.
 
     :param ps: Pattern or String.
     :param region: Rectangle object in order to minimize the area.
-    :return: Location object.
+    :return: MatchResult object for a Pattern, Location object for a String.
     """
     if isinstance(ps, Pattern):
         image_found = match_template(ps, region, MatchTemplateType.SINGLE)
@@ -91,7 +91,7 @@ def find_all(ps: Pattern or str, region: Rectangle = None):
 
     :param ps: Pattern or String.
     :param region: Rectangle object in order to minimize the area.
-    :return: Location object or FindError.
+    :return: List of MatchResult objects, best match first, for a Pattern. List of Location objects for a String.
     """
     if isinstance(ps, Pattern):
         images_found = match_template(ps, region, MatchTemplateType.MULTIPLE)
@@ -114,27 +114,27 @@ def find_all(ps: Pattern or str, region: Rectangle = None):
             raise FindError('Unable to find text %s' % ps)
 
 
-def wait(ps, timeout=None, region=None) -> bool or FindError:
+def wait(ps, timeout=None, region=None) -> MatchResult or Location or FindError:
     """Verify that a Pattern or str appears.
 
     :param ps: String or Pattern.
     :param timeout: Number as maximum waiting time in seconds.
     :param region: Rectangle object in order to minimize the area.
-    :return: True if found, otherwise raise FindError.
+    :return: MatchResult for a Pattern or Location for a String if found, otherwise raise FindError.
     """
-    if isinstance(ps, Pattern):
-        if timeout is None:
-            timeout = Settings.auto_wait_timeout
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
 
+    if isinstance(ps, Pattern):
         image_found = image_find(ps, timeout, region)
         if image_found is not None:
             if get_core_args().highlight:
                 highlight(region=region, ps=ps, location=[image_found])
-            return True
+            return image_found
         else:
             raise FindError('Unable to find image %s' % ps.get_filename())
     elif isinstance(ps, str):
-        text_found = text_find(ps, region)
+        text_found = text_wait(ps, timeout, region)
         if len(text_found) > 0:
             if get_core_args().highlight:
                 highlight(region=region, ps=ps, text_location=text_found)
@@ -145,6 +145,44 @@ def wait(ps, timeout=None, region=None) -> bool or FindError:
         raise ValueError('Invalid input')
 
 
+def find_any(patterns: list, region: Rectangle = None) -> (Pattern, Location) or FindError:
+    """Look for the first of several Patterns, using a single screen capture.
+
+    :param patterns: List of Patterns, in order of priority.
+    :param region: Rectangle object in order to minimize the area.
+    :return: Pair of the matched Pattern and its Location.
+    """
+    match = match_any(patterns, region)
+    if match is not None:
+        index, location = match
+        if get_core_args().highlight:
+            highlight(region=region, ps=patterns[index], location=[location])
+        return patterns[index], location
+    else:
+        raise FindError('Unable to find any of images %s' % ', '.join(p.get_filename() for p in patterns))
+
+
+def wait_any(patterns: list, timeout: float = None, region: Rectangle = None) -> (Pattern, Location) or FindError:
+    """Wait for the first of several Patterns to appear, using a single screen capture per attempt.
+
+    :param patterns: List of Patterns, in order of priority.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param region: Rectangle object in order to minimize the area.
+    :return: Pair of the matched Pattern and its Location.
+    """
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    match = image_find_any(patterns, timeout, region)
+    if match is not None:
+        index, location = match
+        if get_core_args().highlight:
+            highlight(region=region, ps=patterns[index], location=[location])
+        return patterns[index], location
+    else:
+        raise FindError('Unable to find any of images %s' % ', '.join(p.get_filename() for p in patterns))
+
+
 def exists(ps: Pattern or str, timeout: float = None, region: Rectangle = None) -> bool:
     """Check if Pattern or image exists.
 
@@ -200,24 +238,24 @@ def hover(where=None, duration=0, in_region=None):
                 possible_offset = where.get_target_offset()
                 if possible_offset is not None:
                     move_to = Location(pos.x + possible_offset.x, pos.y + possible_offset.y)
-                    pyautogui.moveTo(move_to.x, move_to.y)
+                    Mouse().move(move_to, 0)
                 else:
                     move_to = Location(pos.x, pos.y)
-                    pyautogui.moveTo(move_to.x + needle_width / 2, move_to.y + needle_height / 2)
+                    Mouse().move(Location(move_to.x + needle_width / 2, move_to.y + needle_height / 2), 0)
             else:
-                pyautogui.moveTo(pos.x + needle_width / 2, pos.y + needle_height / 2)
+                Mouse().move(Location(pos.x + needle_width / 2, pos.y + needle_height / 2), 0)
         else:
             raise FindError('Unable to find image %s' % where.get_filename())
 
     elif isinstance(where, str):
         a_match = find(where, True, in_region)
         if a_match is not None:
-            pyautogui.moveTo(a_match['x'] + a_match['width'] / 2, a_match['y'] + a_match['height'] / 2)
+            Mouse().move(Location(a_match['x'] + a_match['width'] / 2, a_match['y'] + a_match['height'] / 2), 0)
         else:
             raise FindError('Unable to find text %s' % where)
 
     elif isinstance(where, Location):
-        pyautogui.moveTo(where.x, where.y, duration)
+        Mouse().move(where, duration)
 
     else:
         raise ValueError('INVALID_GENERIC_INPUT')
@@ -5,6 +5,9 @@
 
 import datetime
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
@@ -17,7 +20,10 @@ except ImportError:
 
 from src.core.api.enums import MatchTemplateType
 from src.core.api.errors import ScreenshotError
+from src.core.api.finder.location_hints import get_hint_area, location_hints, use_location_hints
+from src.core.api.finder.match_result import MatchResult
 from src.core.api.finder.pattern import Pattern
+from src.core.api.finder.polling import FramePoller, get_changed_area, region_in_display_list, wait_for_next_scan
 from src.core.api.location import Location
 from src.core.api.rectangle import Rectangle
 from src.core.api.save_debug_image.save_image import save_debug_image
@@ -29,6 +35,17 @@ from src.core.api.settings import Settings
 logger = logging.getLogger(__name__)
 
 FIND_METHOD = cv2.TM_CCOEFF_NORMED
+MASKED_MIN_VARIANCE = 1.0
+PYRAMID_MIN_NEEDLE_SIZE = 8
+PYRAMID_CANDIDATES = 5
+PYRAMID_COARSE_TOLERANCE = 0.2
+NMS_OVERLAP_THRESHOLD = 0.3
+NEEDLE_SCALE_STEPS = (1.0, 0.9, 1.1, 0.8, 1.25)
+COLOR_MARGIN = 2
+COLOR_MAX_DISTANCE = 10
+
+_executor = None
+_needle_scales = {}
 
 
 def _is_pattern_size_correct(pattern, region):
@@ -47,6 +64,375 @@ def _is_pattern_size_correct(pattern, region):
     return is_correct
 
 
+def _get_pyramid_depth(needle_array, levels: int) -> int:
+    """Returns how many times the needle can be halved while staying large enough to be matched."""
+    height, width = needle_array.shape[:2]
+    depth = 0
+    while depth < levels and min(width, height) >> (depth + 1) >= PYRAMID_MIN_NEEDLE_SIZE:
+        depth += 1
+    return depth
+
+
+def _pyramid_down(image_array, depth: int):
+    """Downscales an image array by a factor of 2 ** depth."""
+    for _ in range(depth):
+        image_array = cv2.pyrDown(image_array)
+    return image_array
+
+
+def _match_template(haystack_array, needle_array, mask_array=None):
+    """Runs cv2.matchTemplate, ignoring the transparent pixels of the needle when a mask is given."""
+    if mask_array is None:
+        return cv2.matchTemplate(haystack_array, needle_array, FIND_METHOD)
+    return _masked_match_template(haystack_array, needle_array, mask_array)
+
+
+def _masked_match_template(haystack_array, needle_array, mask_array):
+    """Zero mean normalized correlation over the opaque pixels of the needle, like a masked TM_CCOEFF_NORMED.
+
+    The pinned OpenCV version only supports masks for methods that do not subtract the mean, which score high on any
+    flat area. The correlation is computed here from unmasked TM_CCORR sums instead, so the scores can be compared to
+    the same similarity as unmasked matches. Windows without variance under the mask score 0.
+
+    Needles of a single color under the mask have no variance either. Only the shape of their opaque pixels can be
+    matched, with any color on any background.
+
+    :param haystack_array: Gray array of the searched area.
+    :param needle_array: Gray array of the pattern.
+    :param mask_array: Binary mask of the opaque pixels of the pattern.
+    :return: Result array, in the layout of cv2.matchTemplate.
+    """
+    count = cv2.countNonZero(mask_array)
+    weights = (mask_array > 0).astype(np.float32)
+    needle = needle_array.astype(np.float32)
+    template = (needle - cv2.mean(needle, mask=mask_array)[0]) * weights
+    template_norm = float(np.sum(template * template))
+    if template_norm < MASKED_MIN_VARIANCE * count:
+        return np.abs(cv2.matchTemplate(haystack_array, mask_array, FIND_METHOD))
+
+    haystack = haystack_array.astype(np.float32)
+    correlation = cv2.matchTemplate(haystack, template, cv2.TM_CCORR)
+    window_sum = cv2.matchTemplate(haystack, weights, cv2.TM_CCORR)
+    window_variance = cv2.matchTemplate(haystack * haystack, weights, cv2.TM_CCORR) - window_sum * window_sum / count
+
+    res = np.zeros_like(correlation)
+    valid = window_variance > MASKED_MIN_VARIANCE * count
+    res[valid] = correlation[valid] / np.sqrt(template_norm * window_variance[valid])
+    return res
+
+
+def _full_match(haystack_array, needle_array, mask_array=None):
+    """Runs a full resolution template match and returns the best score and its location."""
+    res = _match_template(haystack_array, needle_array, mask_array)
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    return max_val, max_loc
+
+
+def _pyramid_match(haystack_array, needle_array, precision: float, levels: int):
+    """Coarse-to-fine template match.
+
+    The needle is searched on a downscaled copy of the haystack first. The best coarse candidates are then refined at
+    full resolution, inside small windows around their upscaled position.
+
+    :param haystack_array: Gray array of the searched area.
+    :param needle_array: Gray array of the pattern.
+    :param precision: Minimum similarity required for a match.
+    :param levels: Maximum number of pyramid levels.
+    :return: Pair of best score and its location, at full resolution.
+    """
+    depth = _get_pyramid_depth(needle_array, levels)
+    if depth == 0:
+        return _full_match(haystack_array, needle_array)
+
+    coarse_haystack = _pyramid_down(haystack_array, depth)
+    coarse_needle = _pyramid_down(needle_array, depth)
+    c_height, c_width = coarse_needle.shape[:2]
+    if coarse_haystack.shape[0] < c_height or coarse_haystack.shape[1] < c_width:
+        return _full_match(haystack_array, needle_array)
+
+    coarse_res = cv2.matchTemplate(coarse_haystack, coarse_needle, FIND_METHOD)
+
+    factor = 2 ** depth
+    margin = 2 * factor
+    n_height, n_width = needle_array.shape[:2]
+    h_height, h_width = haystack_array.shape[:2]
+    best_val, best_loc = -1.0, (0, 0)
+
+    for _ in range(PYRAMID_CANDIDATES):
+        min_val, coarse_val, min_loc, coarse_loc = cv2.minMaxLoc(coarse_res)
+        if coarse_val < precision - PYRAMID_COARSE_TOLERANCE:
+            break
+
+        c_x, c_y = coarse_loc
+        # Suppress the neighbourhood of this candidate, so the next one is a different instance.
+        coarse_res[max(c_y - c_height // 2, 0):c_y + c_height // 2 + 1,
+                   max(c_x - c_width // 2, 0):c_x + c_width // 2 + 1] = -1
+
+        x_start = max(c_x * factor - margin, 0)
+        y_start = max(c_y * factor - margin, 0)
+        x_end = min(c_x * factor + n_width + margin, h_width)
+        y_end = min(c_y * factor + n_height + margin, h_height)
+        if x_end - x_start < n_width or y_end - y_start < n_height:
+            continue
+
+        val, loc = _full_match(haystack_array[y_start:y_end, x_start:x_end], needle_array)
+        if val > best_val:
+            best_val, best_loc = val, (loc[0] + x_start, loc[1] + y_start)
+
+    return best_val, best_loc
+
+
+def _find_peaks(res, precision: float, needle_size: tuple, max_results: int) -> list:
+    """Extracts one match per instance from a matchTemplate result.
+
+    Keeps the local maxima above the precision, then suppresses the weaker of any two matches whose boxes overlap by
+    more than NMS_OVERLAP_THRESHOLD (intersection over union).
+
+    :param res: Result of cv2.matchTemplate.
+    :param precision: Minimum score of a match.
+    :param needle_size: Width and height of the needle.
+    :param max_results: Maximum number of matches returned.
+    :return: List of (x, y, score) tuples, best match first.
+    """
+    candidates = res >= precision
+    if not candidates.any():
+        return []
+
+    candidates &= res >= cv2.dilate(res, np.ones((3, 3), np.uint8))
+    ys, xs = np.nonzero(candidates)
+    scores = res[ys, xs]
+    order = np.argsort(-scores, kind='stable')
+
+    width, height = needle_size
+    area = width * height
+    keep = []
+    while order.size > 0 and len(keep) < max_results:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        overlap_x = np.clip(width - np.abs(xs[rest] - xs[best]), 0, None)
+        overlap_y = np.clip(height - np.abs(ys[rest] - ys[best]), 0, None)
+        intersection = overlap_x * overlap_y
+        order = rest[intersection / (2 * area - intersection) <= NMS_OVERLAP_THRESHOLD]
+
+    return [(int(xs[i]), int(ys[i]), float(scores[i])) for i in keep]
+
+
+def _hint_match(pattern: Pattern, stack_image: ScreenshotImage, region: Rectangle, search_area: Rectangle = None):
+    """Searches a pattern around the position where it was last found, if location hints are enabled.
+
+    :return: Pair of score and image location of a match above the pattern similarity, or a pair of None.
+    """
+    if not use_location_hints():
+        return None, None
+
+    needle_array = pattern.get_gray_array()
+    needle_size = needle_array.shape[1], needle_array.shape[0]
+    if search_area is None:
+        search_area = Rectangle(0, 0, stack_image.width, stack_image.height)
+    hint_area = get_hint_area(pattern.get_file_path(), needle_size, region, search_area)
+    if hint_area is None:
+        return None, None
+
+    hint_array = stack_image.get_gray_array()[hint_area.y:hint_area.y + hint_area.height,
+                                              hint_area.x:hint_area.x + hint_area.width]
+    max_val, max_loc = _full_match(hint_array, needle_array, pattern.get_mask_array())
+    if max_val < pattern.similarity:
+        return None, None
+    return max_val, (max_loc[0] + hint_area.x, max_loc[1] + hint_area.y)
+
+
+def _match_needle(haystack_array, needle_array, precision: float, match_type: MatchTemplateType,
+                  mask_array=None) -> list:
+    """Matches a needle array against a haystack array.
+
+    Masked needles are always matched at full resolution, because the pyramid search does not support masks.
+
+    :return: List of (x, y, score) tuples in haystack coordinates, best match first.
+    """
+    needle_height, needle_width = needle_array.shape[:2]
+    if haystack_array.shape[0] < needle_height or haystack_array.shape[1] < needle_width:
+        return []
+
+    if match_type is MatchTemplateType.SINGLE:
+        if Settings.pyramid_levels > 0 and mask_array is None:
+            max_val, max_loc = _pyramid_match(haystack_array, needle_array, precision, Settings.pyramid_levels)
+        else:
+            max_val, max_loc = _full_match(haystack_array, needle_array, mask_array)
+        if max_val >= precision:
+            return [(max_loc[0], max_loc[1], float(max_val))]
+        return []
+
+    res = _match_template(haystack_array, needle_array, mask_array)
+    return _find_peaks(res, precision, (needle_width, needle_height), Settings.max_matches)
+
+
+def _multi_scale_match(pattern: Pattern, haystack_array, display_scale: float, precision: float,
+                       match_type: MatchTemplateType) -> list:
+    """Matches a pattern against a full resolution capture, resizing the needle instead of the capture.
+
+    A few needle scales around the display scale are tried and the best scoring one is remembered per pattern and
+    display scale, so that following searches try it first.
+
+    :return: List of (x, y, score) tuples in haystack coordinates, best match first.
+    """
+    key = pattern.get_file_path(), display_scale
+    best_factor = _needle_scales.get(key)
+    if best_factor is not None:
+        matches = _match_needle(haystack_array, pattern.get_scaled_gray_array(best_factor), precision, match_type,
+                                pattern.get_scaled_mask_array(best_factor))
+        if len(matches) > 0:
+            return matches
+
+    best_matches = []
+    for step in NEEDLE_SCALE_STEPS:
+        factor = display_scale * step
+        if factor == best_factor:
+            continue
+        matches = _match_needle(haystack_array, pattern.get_scaled_gray_array(factor), precision, match_type,
+                                pattern.get_scaled_mask_array(factor))
+        if len(matches) > 0 and (len(best_matches) == 0 or matches[0][2] > best_matches[0][2]):
+            best_matches = matches
+            _needle_scales[key] = factor
+    return best_matches
+
+
+def _get_needle_size(pattern: Pattern, stack_image: ScreenshotImage) -> (int, int):
+    """Returns the size of a pattern in image coordinates, with the scale last matched for native images."""
+    gray_array = pattern.get_gray_array()
+    if stack_image.scale != 1:
+        factor = _needle_scales.get((pattern.get_file_path(), stack_image.scale), stack_image.scale)
+        gray_array = pattern.get_scaled_gray_array(factor)
+    return gray_array.shape[1], gray_array.shape[0]
+
+
+def _get_color_distance(needle_array, window_array, mask_array=None) -> float:
+    """Returns the mean CIE76 color difference between two BGR arrays of the same size.
+
+    Differences are Euclidean distances in the Lab color space, where about 2.3 is just noticeable. Unlike gray or RGB
+    correlation, they separate colors of equal luminance.
+
+    :param needle_array: BGR array of the pattern.
+    :param window_array: BGR array of the screen area.
+    :param mask_array: Optional mask of the pixels to compare.
+    :return: Mean difference over the compared pixels.
+    """
+    needle_lab = cv2.cvtColor(needle_array.astype(np.float32) / 255, cv2.COLOR_BGR2Lab)
+    window_lab = cv2.cvtColor(window_array.astype(np.float32) / 255, cv2.COLOR_BGR2Lab)
+    difference = np.sqrt(np.sum((needle_lab - window_lab) ** 2, axis=2))
+    return cv2.mean(difference, mask=mask_array)[0]
+
+
+def _is_color_match(pattern: Pattern, stack_image: ScreenshotImage, x: int, y: int, needle_size: tuple) -> bool:
+    """Verifies a gray match in color, within a small window around it.
+
+    The pattern is aligned on the window by its color values, then accepted if its mean color difference to the
+    aligned area is at most COLOR_MAX_DISTANCE.
+
+    :param Pattern pattern: Pattern matched in gray.
+    :param ScreenshotImage stack_image: Captured image of the region.
+    :param x: Horizontal position of the gray match, in image coordinates.
+    :param y: Vertical position of the gray match, in image coordinates.
+    :param needle_size: Width and height of the pattern, in image coordinates.
+    :return: True if the colors are similar.
+    """
+    width, height = needle_size
+    x_start = max(x - COLOR_MARGIN, 0)
+    y_start = max(y - COLOR_MARGIN, 0)
+    x_end = min(x + width + COLOR_MARGIN, stack_image.width)
+    y_end = min(y + height + COLOR_MARGIN, stack_image.height)
+    window = stack_image.get_color_window(Rectangle(x_start, y_start, x_end - x_start, y_end - y_start))
+
+    needle = pattern.get_color_array()
+    mask = pattern.get_mask_array()
+    if needle.shape[1] != width or needle.shape[0] != height:
+        needle = cv2.resize(needle, (width, height), interpolation=cv2.INTER_AREA)
+        if mask is not None:
+            mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+    if mask is None:
+        res = cv2.matchTemplate(window, needle, cv2.TM_SQDIFF)
+    else:
+        res = cv2.matchTemplate(window, needle, cv2.TM_SQDIFF, mask=cv2.merge([mask] * 3))
+        res[~np.isfinite(res)] = np.inf
+    align_x, align_y = cv2.minMaxLoc(res)[2]
+    aligned = window[align_y:align_y + height, align_x:align_x + width]
+    return _get_color_distance(needle, aligned, mask) <= COLOR_MAX_DISTANCE
+
+
+def _match_pattern(pattern: Pattern, stack_image: ScreenshotImage, region: Rectangle,
+                   match_type: MatchTemplateType = MatchTemplateType.SINGLE, search_area: Rectangle = None):
+    """Match a pattern against an already captured image of a region.
+
+    :param Pattern pattern: Image details.
+    :param ScreenshotImage stack_image: Captured image of the region.
+    :param Region region: Region object the image was captured from.
+    :param MatchTemplateType match_type: Type of match_template (single or multiple).
+    :param Rectangle search_area: Optional part of the image to search, in image coordinates.
+    :return: Lists with the MatchResults in screen coordinates, the image locations and the scores of the matches.
+    """
+    locations_list = []
+    save_img_location_list = []
+    scores = []
+    precision = pattern.similarity
+
+    haystack_array = stack_image.get_gray_array()
+    offset_x, offset_y = 0, 0
+    if search_area is not None:
+        offset_x, offset_y = search_area.x, search_area.y
+        haystack_array = haystack_array[offset_y:offset_y + search_area.height, offset_x:offset_x + search_area.width]
+
+    # Color patterns are prefiltered in gray for all candidates, which are then verified in color.
+    search_type = MatchTemplateType.MULTIPLE if pattern.color_match else match_type
+
+    matches = []
+    match_start = time.perf_counter()
+    if stack_image.scale != 1:
+        matches = _multi_scale_match(pattern, haystack_array, stack_image.scale, precision, search_type)
+    else:
+        if search_type is MatchTemplateType.SINGLE:
+            max_val, max_loc = _hint_match(pattern, stack_image, region, search_area)
+            if max_val is not None:
+                matches = [(max_loc[0] - offset_x, max_loc[1] - offset_y, float(max_val))]
+        if len(matches) == 0:
+            matches = _match_needle(haystack_array, pattern.get_gray_array(), precision, search_type,
+                                    pattern.get_mask_array())
+
+    if pattern.color_match:
+        needle_size = _get_needle_size(pattern, stack_image)
+        matches = [match for match in matches
+                   if _is_color_match(pattern, stack_image, match[0] + offset_x, match[1] + offset_y, needle_size)]
+        if match_type is MatchTemplateType.SINGLE:
+            matches = matches[:1]
+
+    if stack_image.scale == 1 and match_type is MatchTemplateType.SINGLE and len(matches) > 0 and \
+            use_location_hints():
+        location_hints.put(pattern.get_file_path(), matches[0][0] + offset_x + region.x,
+                           matches[0][1] + offset_y + region.y)
+    match_time = time.perf_counter() - match_start
+
+    size = pattern.get_size()
+    for x, y, score in matches:
+        x, y = x + offset_x, y + offset_y
+        screen_x, screen_y = int(x / stack_image.scale) + region.x, int(y / stack_image.scale) + region.y
+        locations_list.append(MatchResult(screen_x, screen_y, size, score, pattern, stack_image.timestamp,
+                                          stack_image.capture_time, match_time))
+        save_img_location_list.append(Location(x, y))
+        scores.append(score)
+
+    return locations_list, save_img_location_list, scores
+
+
+def _capture(region: Rectangle, shared: bool = True) -> ScreenshotImage:
+    """Captures a region for image matching, at full resolution if Settings.multi_scale_matching is set.
+
+    :param region: Region to capture.
+    :param shared: Whether the capture may be cropped from a shared display frame.
+    """
+    return ScreenshotImage(region=region, screen_id=region_in_display_list(region),
+                           native=Settings.multi_scale_matching, shared=shared)
+
+
 def match_template(pattern: Pattern, region: Rectangle = None,
                    match_type: MatchTemplateType = MatchTemplateType.SINGLE):
     """Find a pattern in a Region or full screen
@@ -59,30 +445,13 @@ def match_template(pattern: Pattern, region: Rectangle = None,
     if region is None:
         region = DisplayCollection[0].bounds
 
-    locations_list = []
-    save_img_location_list = []
     logger.debug('Searching for pattern: %s' % pattern.get_filename())
     if not isinstance(match_type, MatchTemplateType):
         logger.warning('%s should be an instance of `%s`' % (match_type, MatchTemplateType))
         return []
     try:
-        stack_image = ScreenshotImage(region=region, screen_id=_region_in_display_list(region))
-        precision = pattern.similarity
-
-        res = cv2.matchTemplate(stack_image.get_gray_array(), pattern.get_gray_array(), FIND_METHOD)
-        if match_type is MatchTemplateType.SINGLE:
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-            if max_val >= precision:
-                locations_list.append(Location(max_loc[0] + region.x, max_loc[1] + region.y))
-                save_img_location_list.append(Location(max_loc[0], max_loc[1]))
-        elif match_type is MatchTemplateType.MULTIPLE:
-            loc = np.where(res >= precision)
-            for pt in zip(*loc[::-1]):
-                save_img_location = Location(pt[0], pt[1])
-                location = Location(pt[0] + region.x, pt[1] + region.y)
-                save_img_location_list.append(save_img_location)
-                locations_list.append(location)
-
+        stack_image = _capture(region)
+        locations_list, save_img_location_list, scores = _match_pattern(pattern, stack_image, region, match_type)
         save_debug_image(pattern, stack_image, save_img_location_list)
 
     except ScreenshotError:
@@ -92,29 +461,96 @@ def match_template(pattern: Pattern, region: Rectangle = None,
     return locations_list
 
 
-def _region_in_display_list(region=None):
-    r_x = region.x
-    r_y = region.y
-    r_w = region.width
-    r_h = region.height
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool shared by batched searches. cv2 releases the GIL while matching."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=multiprocessing.cpu_count())
+    return _executor
 
-    for index, display in enumerate(DisplayCollection):
-        d_x = display.bounds.x
-        d_y = display.bounds.y
-        d_w = display.bounds.width
-        d_h = display.bounds.height
 
-        if r_x >= d_x and r_x - d_x + r_w <= d_w and r_y >= d_y and r_y - d_y + r_h <= d_h:
-            return index
+def match_any(patterns: list, region: Rectangle = None) -> (int, Location) or None:
+    """Find the first of several patterns in a single capture of a Region or full screen.
+
+    :param list patterns: List of Pattern objects, in order of priority.
+    :param Region region: Region object.
+    :return: Pair of the index of the first matching pattern and its Location, or None.
+    """
+    if region is None:
+        region = DisplayCollection[0].bounds
+
+    logger.debug('Searching for patterns: %s' % ', '.join(pattern.get_filename() for pattern in patterns))
+    try:
+        stack_image = _capture(region)
+    except ScreenshotError:
+        logger.warning('Screenshot failed.')
+        return None
+    return _match_any_pattern(_get_matchable_patterns(patterns, region), stack_image, region)
+
+
+def _get_matchable_patterns(patterns: list, region: Rectangle) -> list:
+    """Replaces the patterns larger than the region by None, keeping the index of the others."""
+    return [pattern if _is_pattern_size_correct(pattern, region) else None for pattern in patterns]
+
+
+def _match_any_pattern(patterns: list, stack_image: ScreenshotImage, region: Rectangle) -> (int, Location) or None:
+    """Matches several patterns in parallel against one capture and returns the first match in list order.
+
+    Patterns set to None are skipped.
+    """
+    def match(pattern):
+        if pattern is None:
+            return [], [], []
+        return _match_pattern(pattern, stack_image, region)
+
+    if len(patterns) == 1:
+        results = [match(patterns[0])]
+    else:
+        results = _get_executor().map(match, patterns)
+
+    for index, (locations_list, save_img_location_list, scores) in enumerate(results):
+        if len(locations_list) > 0:
+            save_debug_image(patterns[index], stack_image, save_img_location_list)
+            return index, locations_list[0]
+    return None
+
+
+def _get_search_area(changed_area: Rectangle, pattern: Pattern, stack_image: ScreenshotImage) -> Rectangle:
+    """Grows a changed area by the pattern size, so that matches overlapping the change are still found."""
+    p_width, p_height = pattern.get_gray_array().shape[1], pattern.get_gray_array().shape[0]
+    if stack_image.scale != 1:
+        p_width = int(p_width * stack_image.scale * max(NEEDLE_SCALE_STEPS)) + 1
+        p_height = int(p_height * stack_image.scale * max(NEEDLE_SCALE_STEPS)) + 1
+    x = max(changed_area.x - p_width + 1, 0)
+    y = max(changed_area.y - p_height + 1, 0)
+    x_end = min(changed_area.x + changed_area.width + p_width - 1, stack_image.width)
+    y_end = min(changed_area.y + changed_area.height + p_height - 1, stack_image.height)
+    return Rectangle(x, y, x_end - x, y_end - y)
+
+
+def _get_min_changed_pixels(pattern: Pattern) -> int:
+    """Returns the change threshold for a pattern. Small patterns can appear with less than the default change."""
+    p_height, p_width = pattern.get_gray_array().shape[:2]
+    return max(min(Settings.observe_min_changed_pixels, p_width * p_height // 8), 1)
+
+
+def _is_overlapping(area: Rectangle, other: Rectangle) -> bool:
+    """Checks if two rectangles overlap."""
+    return (area.x < other.x + other.width and other.x < area.x + area.width and
+            area.y < other.y + other.height and other.y < area.y + area.height)
 
 
 def image_find(pattern, timeout=None, region=None):
     """ Search for an image in a Region or full screen.
 
+    The region is captured Settings.wait_scan_rate times per second. Matching runs again only when the capture changed
+    since the last match, and only around the tiles that changed. One debug image is saved per call, for the final
+    attempt.
+
     :param Pattern pattern: Name of the searched image.
     :param timeout: Number as maximum waiting time in seconds.
     :param Region region: Region object.
-    :return: Location.
+    :return: MatchResult, or None if not found.
     """
     # if not _is_pattern_size_correct(pattern, region):
     #     return None
@@ -122,42 +558,103 @@ def image_find(pattern, timeout=None, region=None):
     if timeout is None:
         timeout = Settings.auto_wait_timeout
 
-    start_time = datetime.datetime.now()
-    end_time = start_time + datetime.timedelta(seconds=timeout)
+    if region is None:
+        region = DisplayCollection[0].bounds
 
-    while start_time < end_time:
-        time_remaining = end_time - start_time
-        logger.debug("Searching for image %s - %s seconds remaining" % (pattern.get_filename(), time_remaining))
-        pos = match_template(pattern, region, MatchTemplateType.SINGLE)
-        start_time = datetime.datetime.now()
+    last_image = None
+    logger.debug('Searching for image %s for %s seconds' % (pattern.get_filename(), timeout))
+    for stack_image, changed_area in FramePoller(region, timeout, Settings.wait_scan_rate,
+                                                 _get_min_changed_pixels(pattern), Settings.multi_scale_matching):
+        search_area = _get_search_area(changed_area, pattern, stack_image)
+        pos, save_img_location_list, scores = _match_pattern(pattern, stack_image, region, MatchTemplateType.SINGLE,
+                                                     search_area)
+        last_image = stack_image
 
         if len(pos) == 1:
+            save_debug_image(pattern, stack_image, save_img_location_list)
             return pos[0]
+
+    if last_image is not None:
+        save_debug_image(pattern, last_image, [])
+    return None
+
+
+def image_find_any(patterns: list, timeout: float = None, region: Rectangle = None) -> (int, Location) or None:
+    """ Search for any of several images in a Region or full screen, using one capture per attempt.
+
+    Attempts on a capture identical to the previous one are skipped.
+
+    :param list patterns: List of Pattern objects, in order of priority.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param Region region: Region object.
+    :return: Pair of the index of the first matching pattern and its Location, or None.
+    """
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    if region is None:
+        region = DisplayCollection[0].bounds
+
+    logger.debug('Searching for %s images for %s seconds' % (len(patterns), timeout))
+    patterns = _get_matchable_patterns(patterns, region)
+    for stack_image, changed_area in FramePoller(region, timeout, Settings.wait_scan_rate,
+                                                 native=Settings.multi_scale_matching):
+        match = _match_any_pattern(patterns, stack_image, region)
+        if match is not None:
+            return match
     return None
 
 
 def image_vanish(pattern: Pattern, timeout: float = None, region: Rectangle = None) -> None or bool:
     """ Search if an image is NOT in a Region or full screen.
 
+    The region is captured Settings.observe_scan_rate times per second. Matching runs again only when the area where
+    the image was last found changed.
+
     :param Pattern pattern: Name of the searched image.
     :param timeout: Number as maximum waiting time in seconds.
     :param Region region: Region object.
     :return: Location.
     """
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    if region is None:
+        region = DisplayCollection[0].bounds
+
     if not _is_pattern_size_correct(pattern, region):
         return None
 
     pattern_found = True
+    p_width, p_height = pattern.get_gray_array().shape[1], pattern.get_gray_array().shape[0]
+    min_changed_pixels = _get_min_changed_pixels(pattern)
+    previous_array = None
+    found_area = None
+    last_match = None
 
     start_time = datetime.datetime.now()
     end_time = start_time + datetime.timedelta(seconds=timeout)
 
     while pattern_found is True and start_time < end_time:
-        image_found = match_template(pattern, region, MatchTemplateType.SINGLE)
-        if len(image_found) == 0:
-            pattern_found = True
-        else:
-            pattern_found = False
+        try:
+            stack_image = _capture(region, shared=previous_array is None)
+            changed_area = get_changed_area(previous_array, stack_image.get_gray_array(), min_changed_pixels)
+            if changed_area is not None and (found_area is None or _is_overlapping(changed_area, found_area)):
+                previous_array = stack_image.get_gray_array()
+                image_found, save_img_location_list, scores = _match_pattern(pattern, stack_image, region)
+                last_match = stack_image, save_img_location_list
+                if len(image_found) == 0:
+                    pattern_found = False
+                else:
+                    found_area = Rectangle(save_img_location_list[0].x, save_img_location_list[0].y,
+                                           int(p_width * stack_image.scale), int(p_height * stack_image.scale))
+        except ScreenshotError:
+            logger.warning('Screenshot failed.')
+
+        if pattern_found:
+            wait_for_next_scan(start_time, Settings.observe_scan_rate, end_time)
         start_time = datetime.datetime.now()
 
+    if last_match is not None:
+        save_debug_image(pattern, *last_match)
     return None if pattern_found else True
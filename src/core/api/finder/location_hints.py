@@ -0,0 +1,127 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import atexit
+import json
+import logging
+import os
+import threading
+
+from src.core.api.rectangle import Rectangle
+from src.core.api.screen.display import DisplayCollection
+from src.core.util.arg_parser import get_core_args
+from src.core.util.path_manager import PathManager
+
+logger = logging.getLogger(__name__)
+
+HINT_MARGIN = 16
+HINTS_FILE_NAME = 'location_hints.json'
+
+
+class _LocationHints:
+    """Remembers where each pattern was last found, across runs.
+
+    Hints are keyed by pattern path and screen geometry, so a different monitor setup starts from scratch. They are
+    loaded from the working directory on first use and written back at exit.
+    """
+
+    def __init__(self):
+        self._hints = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, path: str):
+        """Returns the last screen position of a pattern as a pair of coordinates, or None."""
+        hint = self._get_hints().get(_get_key(path))
+        return tuple(hint) if hint is not None else None
+
+    def put(self, path: str, x: int, y: int):
+        """Records the screen position where a pattern was found."""
+        key = _get_key(path)
+        hints = self._get_hints()
+        if hints.get(key) != [x, y]:
+            with self._lock:
+                hints[key] = [x, y]
+                self._dirty = True
+
+    def save(self):
+        """Writes the hints to the working directory, if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            file_name = _get_hints_file()
+            temp_file_name = '%s.%s' % (file_name, os.getpid())
+            try:
+                with open(temp_file_name, 'w') as f:
+                    json.dump(self._hints, f)
+                os.replace(temp_file_name, file_name)
+                self._dirty = False
+            except (IOError, OSError) as e:
+                logger.warning('Unable to save location hints: %s' % e)
+
+    def _get_hints(self) -> dict:
+        if self._hints is None:
+            with self._lock:
+                if self._hints is None:
+                    self._hints = _load_hints()
+        return self._hints
+
+
+def _get_hints_file() -> str:
+    cache_dir = os.path.join(PathManager.get_working_dir(), 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, HINTS_FILE_NAME)
+
+
+def _load_hints() -> dict:
+    try:
+        with open(_get_hints_file()) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _get_key(path: str) -> str:
+    geometry = ','.join('%sx%s+%s+%s@%s' % (display.bounds.width, display.bounds.height, display.bounds.x,
+                                            display.bounds.y, display.scale) for display in DisplayCollection)
+    return '%s|%s' % (os.path.realpath(path), geometry)
+
+
+def use_location_hints() -> bool:
+    """Checks if location hints were enabled with the --location_hints argument."""
+    return get_core_args().location_hints
+
+
+def get_hint_area(path: str, size: tuple, region: Rectangle, search_area: Rectangle) -> Rectangle or None:
+    """Returns a small area around the last position of a pattern, to search before the whole region.
+
+    :param path: Pattern file path.
+    :param size: Pattern width and height.
+    :param region: Captured region, in screen coordinates.
+    :param search_area: Part of the captured image that will be searched, in image coordinates.
+    :return: Hint area in image coordinates, or None if there is no hint inside the search area.
+    """
+    hint = location_hints.get(path)
+    if hint is None:
+        return None
+
+    x = hint[0] - region.x - HINT_MARGIN
+    y = hint[1] - region.y - HINT_MARGIN
+    width = size[0] + 2 * HINT_MARGIN
+    height = size[1] + 2 * HINT_MARGIN
+
+    x_start = max(x, search_area.x)
+    y_start = max(y, search_area.y)
+    x_end = min(x + width, search_area.x + search_area.width)
+    y_end = min(y + height, search_area.y + search_area.height)
+    if x_end - x_start < size[0] or y_end - y_start < size[1]:
+        return None
+    if x_end - x_start == search_area.width and y_end - y_start == search_area.height:
+        return None
+    return Rectangle(x_start, y_start, x_end - x_start, y_end - y_start)
+
+
+location_hints = _LocationHints()
+atexit.register(location_hints.save)
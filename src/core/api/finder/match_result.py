@@ -0,0 +1,41 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+from src.core.api.location import Location
+from src.core.api.rectangle import Rectangle
+
+
+class MatchResult(Location):
+    """Result of an image find operation.
+
+    A MatchResult is the Location of the top left corner of the match, so it can be used wherever find operations
+    returned a Location before. It also carries the details of the match:
+
+    size            -   Pair of width and height of the matched pattern.
+    score           -   Similarity score of the match, between 0 and 1.
+    pattern         -   The matched Pattern.
+    timestamp       -   Time at which the matched frame was captured, in seconds since the epoch.
+    capture_time    -   Seconds spent capturing the frame.
+    match_time      -   Seconds spent matching the pattern against the frame.
+    """
+
+    __slots__ = ('size', 'score', 'pattern', 'timestamp', 'capture_time', 'match_time')
+
+    def __init__(self, x: int = 0, y: int = 0, size: tuple = (0, 0), score: float = None, pattern=None,
+                 timestamp: float = None, capture_time: float = None, match_time: float = None):
+        Location.__init__(self, x, y)
+        self.size = size
+        self.score = score
+        self.pattern = pattern
+        self.timestamp = timestamp
+        self.capture_time = capture_time
+        self.match_time = match_time
+
+    def __repr__(self):
+        return '%s(%r, %r, score: %.3f)' % (self.__class__.__name__, self.x, self.y, self.score or 0)
+
+    def get_rectangle(self) -> Rectangle:
+        """Returns the screen area covered by the match."""
+        return Rectangle(self.x, self.y, self.size[0], self.size[1])
@@ -0,0 +1,186 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import hashlib
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+
+from src.core.api.settings import Settings
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = multiprocessing.cpu_count()
+OCR_CACHE_ENTRY_OVERHEAD = 256
+
+
+class _TesseractInitError(Exception):
+    """Raised when a libtesseract handle cannot be initialized, for example without matching tessdata."""
+
+
+class _TesseractAPIPool:
+    """Pool of initialized libtesseract handles, so the language model is loaded once per worker.
+
+    A handle is not thread safe. Each OCR job takes one from the pool and gives it back when done.
+    """
+
+    def __init__(self):
+        self._handles = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def image_to_rows(self, image) -> list:
+        api = self._acquire()
+        try:
+            api.SetImage(image)
+            tsv = api.GetTSVText(0)
+        finally:
+            api.Clear()
+            self._handles.put(api)
+        return [line.split() for line in tsv.splitlines()]
+
+    def _acquire(self):
+        try:
+            return self._handles.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < OCR_WORKERS:
+                logger.debug('Starting tesseract worker %s.' % (self._created + 1))
+                try:
+                    api = tesserocr.PyTessBaseAPI()
+                except Exception as e:
+                    raise _TesseractInitError(e)
+                self._created += 1
+                return api
+        return self._handles.get()
+
+
+_api_pool = _TesseractAPIPool() if tesserocr is not None else None
+_api_pool_lock = threading.Lock()
+_executor = None
+
+
+def _disable_api_pool(error: Exception):
+    """Stops using libtesseract handles, so that following OCR jobs run the tesseract process."""
+    global _api_pool
+    with _api_pool_lock:
+        if _api_pool is not None:
+            logger.warning('Unable to initialize libtesseract, using the tesseract command instead: %s' % error)
+            _api_pool = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool running OCR jobs. Both libtesseract and the tesseract process release the GIL."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix='OCR')
+    return _executor
+
+
+def image_to_rows(image) -> list:
+    """Runs OCR on an image.
+
+    Uses warm libtesseract handles when tesserocr is installed and falls back to one tesseract process per call. If
+    libtesseract cannot be initialized, the handles are not used again.
+
+    :param image: PIL Image.
+    :return: List of TSV rows split into columns. The header row is not included.
+    """
+    api_pool = _api_pool
+    if api_pool is not None:
+        try:
+            return api_pool.image_to_rows(image)
+        except _TesseractInitError as e:
+            _disable_api_pool(e)
+    return [line.split() for line in pytesseract.image_to_data(image).splitlines()[1:]]
+
+
+def map_images(function, items, timeout: float = None) -> list:
+    """Runs OCR jobs in parallel.
+
+    :param function: Callable receiving an item and returning its result. Usually prepares an image and calls
+    image_to_rows.
+    :param items: Job arguments.
+    :param timeout: Maximum number of seconds to wait for all results, or None to wait until they finish. Jobs that
+    did not start by then are cancelled.
+    :return: List of results, in the order of the items.
+    :raises concurrent.futures.TimeoutError: If the results are not available in time.
+    """
+    return list(_get_executor().map(function, items, timeout=timeout))
+
+
+class _OcrCache:
+    """LRU cache of parsed OCR results, bounded by Settings.ocr_cache_limit.
+
+    Sizes are estimated from the number and length of the cached words.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, words: list):
+        limit = Settings.ocr_cache_limit * 1024 * 1024
+        size = OCR_CACHE_ENTRY_OVERHEAD * (len(words) + 1) + sum(sys.getsizeof(text) for text, _ in words)
+        if size > limit:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (words, size)
+            self.size += size
+            while self.size > limit:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+ocr_cache = _OcrCache()
+
+
+def get_frame_hash(array) -> str:
+    """Returns a fast content hash of an image array, including its shape."""
+    digest = hashlib.blake2b(str(array.shape).encode(), digest_size=16)
+    digest.update(array.data if array.flags['C_CONTIGUOUS'] else array.tobytes())
+    return digest.hexdigest()
+
+
+def get_ocr_cache_stats() -> dict:
+    """Returns the hit and miss counters and the estimated memory used by the OCR result cache."""
+    return {'hits': ocr_cache.hits, 'misses': ocr_cache.misses, 'entries': len(ocr_cache),
+            'size': ocr_cache.size}
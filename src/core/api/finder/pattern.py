@@ -3,14 +3,17 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
-import inspect
+import copy
 import logging
 import os
+import sys
+from collections import namedtuple
 
 import cv2
 import numpy as np
 
 from src.core.api.errors import FindError
+from src.core.api.finder import pattern_cache
 from src.core.api.location import Location
 from src.core.api.os_helpers import OSHelper
 from src.core.api.settings import Settings
@@ -24,6 +27,16 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+_PatternAsset = namedtuple('_PatternAsset', ['size', 'rgb_array', 'color_image', 'gray_image', 'gray_array',
+                                             'mask_array', 'scaled_gray_arrays'])
+_pattern_assets = {}
+_image_paths = {}
+_directory_files = {}
+_all_patterns = {}
+_os_version_directory = None
+
+MASK_ALPHA_THRESHOLD = 250
+
 
 class Pattern:
     """A pattern is used to associate an image file with additional attributes used in find operations.
@@ -36,23 +49,26 @@ class Pattern:
     def __init__(self, image_name: str, from_path: str = None, application: str = get_core_args().application):
 
         if from_path is None:
-            path = _get_image_path(inspect.stack()[1][1], image_name, application)
+            path = _get_image_path(sys._getframe(1).f_code.co_filename, image_name, application)
         else:
             path = from_path
-        name, scale = _parse_name(os.path.split(path)[1])
+        name, scale = parse_pattern_name(os.path.split(path)[1])
 
-        image = cv2.imread(path)
+        asset = _get_pattern_asset(path, scale)
 
         self.image_name = name
         self.image_path = path
         self.scale_factor = scale
         self.similarity = Settings.min_similarity
+        self.color_match = False
         self._target_offset = None
-        self._size = _get_pattern_size(image, scale)
-        self.rgb_array = _get_array_from_image(image)
-        self.color_image = _get_image_from_array(scale, self.rgb_array)
-        self.gray_image = _get_gray_image(self.color_image)
-        self.gray_array = _get_array_from_image(self.gray_image)
+        self._size = asset.size
+        self.rgb_array = asset.rgb_array
+        self.color_image = asset.color_image
+        self.gray_image = asset.gray_image
+        self.gray_array = asset.gray_array
+        self.mask_array = asset.mask_array
+        self._scaled_gray_arrays = asset.scaled_gray_arrays
 
     def __str__(self):
         return '(%s, %s, %s, %s)' % (self.image_name, self.image_path, self.scale_factor, self.similarity)
@@ -68,7 +84,7 @@ class Pattern:
         :param int dy: y offset from center.
         :return: A new pattern object.
         """
-        new_pattern = Pattern(self.image_name, from_path=self.image_path)
+        new_pattern = copy.copy(self)
         new_pattern._target_offset = Location(dx, dy)
         return new_pattern
 
@@ -104,6 +120,38 @@ class Pattern:
         """Getter for the gray_array property."""
         return self.gray_array
 
+    def get_scaled_gray_array(self, factor: float):
+        """Returns the gray array of the pattern at factor image pixels per screen coordinate.
+
+        The array is resized from the original image file and cached with the pattern image.
+
+        :param factor: Scale of the returned array, relative to the pattern size in screen coordinates.
+        :return: Read-only gray array.
+        """
+        gray_array = self._scaled_gray_arrays.get(factor)
+        if gray_array is None:
+            gray_array = _get_scaled_gray_array(self.rgb_array, factor / self.scale_factor)
+            gray_array.setflags(write=False)
+            self._scaled_gray_arrays[factor] = gray_array
+        return gray_array
+
+    def get_mask_array(self):
+        """Getter for the mask array built from the image transparency. None if the image is opaque."""
+        return self.mask_array
+
+    def get_scaled_mask_array(self, factor: float):
+        """Returns the mask array resized like get_scaled_gray_array(factor), or None if the image is opaque."""
+        if self.mask_array is None:
+            return None
+        key = 'mask', factor
+        mask_array = self._scaled_gray_arrays.get(key)
+        if mask_array is None:
+            height, width = self.get_scaled_gray_array(factor).shape
+            mask_array = cv2.resize(self.mask_array, (width, height), interpolation=cv2.INTER_NEAREST)
+            mask_array.setflags(write=False)
+            self._scaled_gray_arrays[key] = mask_array
+        return mask_array
+
     def similar(self, value: float):
         """Set the minimum similarity of the given Pattern object to the specified value."""
         if value > 0.99:
@@ -119,12 +167,114 @@ class Pattern:
         self.similarity = 0.99
         return self
 
+    def with_color(self):
+        """Require matches of the given Pattern object to have similar colors, not only a similar gray image.
+
+        Candidates are found on gray images first, then verified in color around each candidate. The color check has
+        its own threshold on the mean color difference, independent of the similarity.
+        """
+        self.color_match = True
+        return self
+
+    def get_color_array(self):
+        """Getter for the BGR array of the image, in screen coordinates."""
+        return np.asarray(self.color_image)
+
     def get_size(self):
         """Getter for the _size property."""
         return self._size
 
 
-def _parse_name(full_name: str) -> (str, int):
+def _get_pattern_asset(path: str, scale: float) -> _PatternAsset:
+    """Returns the decoded image data of a pattern file.
+
+    Each file is decoded once per process. Arrays are read-only and shared by all the Patterns created from that file.
+
+    :param str path: Path of the image file.
+    :param scale: Scale factor of the image.
+    :return: _PatternAsset.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    key = (path, mtime)
+    asset = _pattern_assets.get(key)
+    if asset is None:
+        asset = _load_pattern_asset(path, mtime, scale)
+        _pattern_assets[key] = asset
+    return asset
+
+
+def _load_pattern_asset(path: str, mtime: int, scale: float) -> _PatternAsset:
+    """Decodes a pattern file, using the on-disk pattern cache when the file was built or --pattern_cache is set."""
+    cache_file = None
+    if mtime is not None:
+        cache_file = pattern_cache.get_cache_file(path, mtime, scale)
+        if cache_file is not None:
+            arrays = pattern_cache.load_arrays(cache_file)
+            if arrays is not None:
+                return _create_pattern_asset(*arrays, scale)
+
+    image, gray_array, mask_array = load_pattern_image(path, scale)
+    if cache_file is not None and image is not None:
+        pattern_cache.save_arrays(cache_file, image, gray_array, mask_array)
+    return _create_pattern_asset(image, gray_array, mask_array, scale)
+
+
+def load_pattern_image(path: str, scale: float):
+    """Decodes a pattern image file.
+
+    :param path: Path of the image file.
+    :param scale: Scale factor of the image.
+    :return: Tuple of the BGR array at file resolution, and of the gray and mask arrays in screen coordinates. All
+    three are None if the file cannot be decoded. The mask is None for opaque images.
+    """
+    image, mask_array = _split_alpha(cv2.imread(path, cv2.IMREAD_UNCHANGED), scale)
+    gray_array = _get_array_from_image(_get_gray_image(_get_image_from_array(scale, image)))
+    return image, gray_array, mask_array
+
+
+def _split_alpha(image, scale: float):
+    """Separates the alpha channel of a decoded image.
+
+    :param image: Array decoded with cv2.IMREAD_UNCHANGED, or None.
+    :param scale: Scale factor of the image.
+    :return: Pair of the BGR array and the mask array in screen coordinates. The mask is None when the image has no
+    transparent pixels, so that opaque patterns keep using unmasked matching.
+    """
+    if image is None:
+        return None, None
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), None
+    if image.shape[2] != 4:
+        return image, None
+
+    bgr_array = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    alpha_array = image[:, :, 3]
+    if scale > 1:
+        height, width = alpha_array.shape
+        alpha_array = cv2.resize(alpha_array, (int(width / scale), int(height / scale)), interpolation=cv2.INTER_AREA)
+    if alpha_array.min() >= MASK_ALPHA_THRESHOLD:
+        return bgr_array, None
+    mask_array = np.where(alpha_array >= MASK_ALPHA_THRESHOLD, 255, 0).astype(np.uint8)
+    return bgr_array, mask_array
+
+
+def _create_pattern_asset(rgb_array, gray_array, mask_array, scale: float) -> _PatternAsset:
+    """Builds a read-only _PatternAsset from the original, the gray and the mask arrays of a pattern."""
+    if rgb_array is None:
+        return _PatternAsset(None, None, None, None, None, None, {})
+
+    for array in (rgb_array, gray_array, mask_array):
+        if array is not None and array.flags.writeable:
+            array.setflags(write=False)
+    return _PatternAsset(_get_pattern_size(rgb_array, scale), rgb_array, _get_image_from_array(scale, rgb_array),
+                         Image.fromarray(gray_array), gray_array, mask_array, {})
+
+
+def parse_pattern_name(full_name: str) -> (str, int):
     """Detects the scale factor in image name.
 
     :param str full_name: Image full name. Valid format name@[scale_factor]x.png.
@@ -149,7 +299,10 @@ def _parse_name(full_name: str) -> (str, int):
 
 
 def _load_all_patterns(application: str) -> list:
-    """Function returns a list with all the project's Patterns."""
+    """Function returns a list with all the project's Patterns. The project is only scanned once per run."""
+    if application in _all_patterns:
+        return _all_patterns[application]
+
     if get_core_args().resize:
         _convert_hi_res_images()
     result_list = []
@@ -157,10 +310,11 @@ def _load_all_patterns(application: str) -> list:
         for file_name in files:
             if file_name.endswith('.png'):
                 if application in root and (PathManager.get_images_path() in root or 'common' in root):
-                    pattern_name, pattern_scale = _parse_name(file_name)
+                    pattern_name, pattern_scale = parse_pattern_name(file_name)
                     pattern_path = os.path.join(root, file_name)
                     pattern = {'name': pattern_name, 'path': pattern_path, 'scale': pattern_scale}
                     result_list.append(pattern)
+    _all_patterns[application] = result_list
     return result_list
 
 
@@ -200,6 +354,17 @@ def _apply_scale(scale: int, rgb_array):
         return rgb_array
 
 
+def _get_scaled_gray_array(rgb_array, ratio: float):
+    """Converts the original pattern image to gray and resizes it by ratio."""
+    gray_array = cv2.cvtColor(rgb_array, cv2.COLOR_BGR2GRAY)
+    if ratio == 1:
+        return gray_array
+    height, width = gray_array.shape
+    new_size = max(int(round(width * ratio)), 1), max(int(round(height * ratio)), 1)
+    interpolation = cv2.INTER_AREA if ratio < 1 else cv2.INTER_CUBIC
+    return cv2.resize(gray_array, new_size, interpolation=interpolation)
+
+
 def _get_array_from_image(image: Image):
     """Returns np array from an Image."""
     if image is None:
@@ -228,6 +393,34 @@ def _get_gray_image(colored_image: Image) -> Image:
     return colored_image.convert('L')
 
 
+def _get_os_version_directory() -> str:
+    """Returns the name of the platform image folder. Computed once, as it may require a screen capture."""
+    global _os_version_directory
+    if _os_version_directory is None:
+        if OSHelper.get_os_version() == 'win7':
+            _os_version_directory = 'win7'
+        else:
+            _os_version_directory = OSHelper.get_os().value
+    return _os_version_directory
+
+
+def _normalize_file_name(file_name: str) -> str:
+    """File names are case insensitive on Windows and Mac."""
+    return file_name if OSHelper.is_linux() else file_name.lower()
+
+
+def _get_directory_files(directory: str) -> dict:
+    """Returns the image files of a directory, listed once per run and keyed by normalized name."""
+    files = _directory_files.get(directory)
+    if files is None:
+        try:
+            files = {_normalize_file_name(f): f for f in os.listdir(directory)}
+        except OSError:
+            files = {}
+        _directory_files[directory] = files
+    return files
+
+
 def _get_image_path(caller, image: str, application: str) -> str:
     """Enforce proper location for all Pattern creation.
 
@@ -246,67 +439,64 @@ def _get_image_path(caller, image: str, application: str) -> str:
     If the above fails, we will look up the file name in the list of project-wide images,
     and return whatever we find, with a warning message.
     If we find nothing, we will raise an exception.
+
+    Directory listings and resolved paths are cached, so only the first lookup of an image touches the disk.
     """
 
-    module = os.path.split(caller)[1]
     module_directory = os.path.split(caller)[0]
-    parent_directory = os.path.basename(module_directory)
-    file_name = image.split('.')[0]
-    names = [image, '%s@2x.png' % file_name, '%s@3x.png' % file_name, '%s@4x.png' % file_name]
-
-    if OSHelper.get_os_version() == 'win7':
-        os_version = 'win7'
-    else:
-        os_version = OSHelper.get_os().value
-    paths = []
     current_locale = ''
     try:
         current_locale = get_core_args().locale
     except AttributeError:
         pass
 
+    key = (module_directory, _get_os_version_directory(), current_locale, application, image)
+    image_path = _image_paths.get(key)
+    if image_path is None:
+        image_path = _resolve_image_path(caller, image, application, current_locale)
+        _image_paths[key] = image_path
+    return image_path
+
+
+def _resolve_image_path(caller, image: str, application: str, current_locale: str) -> str:
+    """Looks up an image relative to its calling module. See _get_image_path."""
+    module = os.path.split(caller)[1]
+    module_directory = os.path.split(caller)[0]
+    parent_directory = os.path.basename(module_directory)
+    file_name = image.split('.')[0]
+    names = [image, '%s@2x.png' % file_name, '%s@3x.png' % file_name, '%s@4x.png' % file_name]
+
+    os_version = _get_os_version_directory()
     platform_directory = os.path.join(module_directory, 'images', os_version)
     platform_locale_directory = os.path.join(platform_directory, current_locale)
-    for name in names:
-        paths.append(os.path.join(platform_locale_directory, name))
-
     common_directory = os.path.join(module_directory, 'images', 'common')
     common_locale_directory = os.path.join(common_directory, current_locale)
-    for name in names:
-        paths.append(os.path.join(common_locale_directory, name))
-
-    for name in names:
-        paths.append(os.path.join(platform_directory, name))
-
-    for name in names:
-        paths.append(os.path.join(common_directory, name))
-
-    found = False
-    image_path = None
-    for path in paths:
-        if os.path.exists(path):
-            found = True
-            image_path = path
-            break
-
-    if found:
-        logger.debug('Module %s requests image %s' % (module, image))
-        logger.debug('Found %s' % image_path)
-        return image_path
+
+    paths = []
+    for directory in [platform_locale_directory, common_locale_directory, platform_directory, common_directory]:
+        files = _get_directory_files(directory)
+        for name in names:
+            paths.append(os.path.join(directory, name))
+            found_name = files.get(_normalize_file_name(name))
+            if found_name is not None:
+                image_path = os.path.join(directory, found_name)
+                logger.debug('Module %s requests image %s' % (module, image))
+                logger.debug('Found %s' % image_path)
+                return image_path
+
+    result_list = [x for x in _load_all_patterns(application) if x['name'] == image]
+    if len(result_list) > 0:
+        res = result_list[0]
+        logger.warning('Failed to find image %s in default locations for module %s.' % (image, module))
+        logger.warning('Using this one instead: %s' % res['path'])
+        logger.warning('Please move image to correct location relative to caller.')
+        location_1 = os.path.join(parent_directory, 'images', 'common')
+        location_2 = os.path.join(parent_directory, PathManager.get_images_path())
+        logger.warning('Suggested locations: %s, %s' % (location_1, location_2))
+        return res['path']
     else:
-        result_list = [x for x in _load_all_patterns(application) if x['name'] == image]
-        if len(result_list) > 0:
-            res = result_list[0]
-            logger.warning('Failed to find image %s in default locations for module %s.' % (image, module))
-            logger.warning('Using this one instead: %s' % res['path'])
-            logger.warning('Please move image to correct location relative to caller.')
-            location_1 = os.path.join(parent_directory, 'images', 'common')
-            location_2 = os.path.join(parent_directory, PathManager.get_images_path())
-            logger.warning('Suggested locations: %s, %s' % (location_1, location_2))
-            return res['path']
-        else:
-            logger.error('Pattern creation for %s failed for caller %s.' % (image, caller))
-            logger.error('Image not found. Either it is in the wrong platform folder, or it does not exist.')
-            logger.debug('Paths searched:')
-            logger.debug('\n'.join(paths))
-            raise FindError('Pattern not found.')
+        logger.error('Pattern creation for %s failed for caller %s.' % (image, caller))
+        logger.error('Image not found. Either it is in the wrong platform folder, or it does not exist.')
+        logger.debug('Paths searched:')
+        logger.debug('\n'.join(paths))
+        raise FindError('Pattern not found.')
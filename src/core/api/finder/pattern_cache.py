@@ -0,0 +1,151 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from src.core.util.arg_parser import get_core_args
+from src.core.util.path_manager import PathManager
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 3
+MANIFEST_FILE_NAME = 'manifest.json'
+
+
+class _PatternManifest:
+    """Paths and modification times of the pattern files preprocessed by `iris patterns build`.
+
+    Each entry maps the real path of an image to its modification time and content digest. Runs load the manifest
+    once and use the cached arrays of every image that did not change since the build.
+    """
+
+    def __init__(self):
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def get_digest(self, path: str, mtime: int) -> str or None:
+        """Returns the content digest recorded for a pattern file, or None if it was not built or changed since."""
+        entry = self._get_entries().get(os.path.realpath(path))
+        if entry is None or entry[0] != mtime:
+            return None
+        return entry[1]
+
+    def save(self, entries: dict):
+        """Replaces the manifest with new entries of real path and pair of modification time and digest."""
+        file_name = os.path.join(get_cache_dir(), MANIFEST_FILE_NAME)
+        temp_file_name = '%s.%s' % (file_name, os.getpid())
+        with self._lock:
+            with open(temp_file_name, 'w') as f:
+                json.dump(entries, f)
+            os.replace(temp_file_name, file_name)
+            self._entries = entries
+
+    def _get_entries(self) -> dict:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = _load_manifest()
+        return self._entries
+
+
+def _load_manifest() -> dict:
+    try:
+        with open(os.path.join(get_cache_dir(), MANIFEST_FILE_NAME)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def get_cache_dir() -> str:
+    """Returns the directory of the on-disk pattern cache, inside the working directory."""
+    cache_dir = os.path.join(PathManager.get_working_dir(), 'cache', 'patterns')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_file_digest(path: str, scale: float) -> str:
+    """Returns the digest naming the cache entry of an image file.
+
+    The arrays in screen coordinates depend on the scale factor of the file name, so it is hashed with the contents.
+    """
+    digest = hashlib.sha1(('%s:%s:' % (CACHE_FORMAT_VERSION, float(scale))).encode('utf-8'))
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_cache_file(path: str, mtime: int, scale: float) -> str or None:
+    """Returns the base name of the cache files of a pattern.
+
+    Built patterns are looked up in the manifest. Other patterns are only cached when the --pattern_cache argument is
+    set, in which case the file contents are hashed.
+
+    :param path: Pattern file path.
+    :param mtime: Modification time of the file, in nanoseconds.
+    :param scale: Scale factor of the image.
+    :return: Base name of the cache files, or None if the pattern should not be cached.
+    """
+    digest = manifest.get_digest(path, mtime)
+    if digest is None:
+        if not get_core_args().pattern_cache:
+            return None
+        try:
+            digest = get_file_digest(path, scale)
+        except (IOError, OSError):
+            return None
+    return os.path.join(get_cache_dir(), digest)
+
+
+def is_cached(cache_file: str) -> bool:
+    """Checks if the arrays of a pattern are in the cache."""
+    return os.path.exists('%s_rgb.npy' % cache_file) and os.path.exists('%s_gray.npy' % cache_file)
+
+
+def load_arrays(cache_file: str):
+    """Memory-maps the cached arrays of a pattern.
+
+    :param cache_file: Base name returned by get_cache_file.
+    :return: Tuple of the BGR, gray and mask arrays, or None if the pattern is not cached. The mask is None for opaque
+    images.
+    """
+    try:
+        rgb_array = np.load('%s_rgb.npy' % cache_file, mmap_mode='r')
+        gray_array = np.load('%s_gray.npy' % cache_file, mmap_mode='r')
+        mask_array = None
+        if os.path.exists('%s_mask.npy' % cache_file):
+            mask_array = np.load('%s_mask.npy' % cache_file, mmap_mode='r')
+        return rgb_array, gray_array, mask_array
+    except (IOError, ValueError):
+        return None
+
+
+def save_arrays(cache_file: str, rgb_array, gray_array, mask_array):
+    """Writes the arrays of a pattern to the cache.
+
+    The mask goes first, so that a complete rgb and gray pair always comes with its mask.
+    """
+    if mask_array is not None:
+        _save_array('%s_mask.npy' % cache_file, mask_array)
+    _save_array('%s_rgb.npy' % cache_file, rgb_array)
+    _save_array('%s_gray.npy' % cache_file, gray_array)
+
+
+def _save_array(file_name: str, array):
+    """Writes an array to the cache without exposing partially written files."""
+    temp_file_name = '%s.%s.npy' % (file_name, os.getpid())
+    try:
+        np.save(temp_file_name, array)
+        os.replace(temp_file_name, file_name)
+    except OSError as e:
+        logger.debug('Unable to write pattern cache file %s: %s' % (file_name, e))
+
+
+manifest = _PatternManifest()
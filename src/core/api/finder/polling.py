@@ -0,0 +1,122 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import datetime
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from src.core.api.errors import ScreenshotError
+from src.core.api.rectangle import Rectangle
+from src.core.api.screen.display import DisplayCollection
+from src.core.api.screen.screenshot_image import ScreenshotImage
+
+logger = logging.getLogger(__name__)
+
+DIFF_TILE_SIZE = 32
+
+
+def region_in_display_list(region=None):
+    """Returns the index of the display containing the region, or None if it spans several displays."""
+    r_x = region.x
+    r_y = region.y
+    r_w = region.width
+    r_h = region.height
+
+    for index, display in enumerate(DisplayCollection):
+        d_x = display.bounds.x
+        d_y = display.bounds.y
+        d_w = display.bounds.width
+        d_h = display.bounds.height
+
+        if r_x >= d_x and r_x - d_x + r_w <= d_w and r_y >= d_y and r_y - d_y + r_h <= d_h:
+            return index
+
+
+def get_changed_area(previous_array, current_array, min_changed_pixels: int) -> Rectangle or None:
+    """Compares two captures of the same region tile by tile.
+
+    :param previous_array: Gray array of the previous capture, or None.
+    :param current_array: Gray array of the current capture.
+    :param min_changed_pixels: Minimum number of changed pixels that counts as a change.
+    :return: Bounding box of the changed tiles in image coordinates, or None if nothing changed.
+    """
+    height, width = current_array.shape[:2]
+    if previous_array is None or previous_array.shape != current_array.shape:
+        return Rectangle(0, 0, width, height)
+
+    changed = cv2.absdiff(previous_array, current_array) > 0
+    if np.count_nonzero(changed) < min_changed_pixels:
+        return None
+
+    rows = -(-height // DIFF_TILE_SIZE)
+    columns = -(-width // DIFF_TILE_SIZE)
+    tiles = np.zeros((rows * DIFF_TILE_SIZE, columns * DIFF_TILE_SIZE), dtype=bool)
+    tiles[:height, :width] = changed
+    tiles = tiles.reshape(rows, DIFF_TILE_SIZE, columns, DIFF_TILE_SIZE).any(axis=(1, 3))
+
+    tile_rows, tile_columns = np.nonzero(tiles)
+    x = int(tile_columns.min()) * DIFF_TILE_SIZE
+    y = int(tile_rows.min()) * DIFF_TILE_SIZE
+    x_end = min((int(tile_columns.max()) + 1) * DIFF_TILE_SIZE, width)
+    y_end = min((int(tile_rows.max()) + 1) * DIFF_TILE_SIZE, height)
+    return Rectangle(x, y, x_end - x, y_end - y)
+
+
+def wait_for_next_scan(scan_start: datetime.datetime, scan_rate: float, end_time: datetime.datetime):
+    """Sleeps until the next scan is due, without going past the end of the wait."""
+    if scan_rate is None or scan_rate <= 0:
+        return
+    next_scan = min(scan_start + datetime.timedelta(seconds=1 / float(scan_rate)), end_time)
+    delay = (next_scan - datetime.datetime.now()).total_seconds()
+    if delay > 0:
+        time.sleep(delay)
+
+
+class FramePoller:
+    """Polling engine shared by image and text waits.
+
+    Captures a region at a fixed scan rate until the deadline and yields only the captures that changed since the
+    last yielded one. Iterating yields pairs of ScreenshotImage and the bounding box of the changed area, in image
+    coordinates. The first capture is always yielded. Native captures keep the full display resolution.
+
+    Only the first capture may come from a shared display frame; the following ones are always new screenshots.
+    """
+
+    def __init__(self, region: Rectangle, timeout: float, scan_rate: float, min_changed_pixels: int = 1,
+                 native: bool = False):
+        self.region = region
+        self.native = native
+        self.scan_rate = scan_rate
+        self.min_changed_pixels = min_changed_pixels
+        self.end_time = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+
+    def time_remaining(self) -> float:
+        """Returns the number of seconds left before the deadline."""
+        return max((self.end_time - datetime.datetime.now()).total_seconds(), 0)
+
+    def __iter__(self):
+        previous_array = None
+        screen_id = region_in_display_list(self.region)
+        start_time = datetime.datetime.now()
+
+        while start_time < self.end_time:
+            logger.debug('Polling region %s - %s seconds remaining' % (self.region, self.end_time - start_time))
+            changed_area = None
+            try:
+                stack_image = ScreenshotImage(region=self.region, screen_id=screen_id, native=self.native,
+                                              shared=previous_array is None)
+                changed_area = get_changed_area(previous_array, stack_image.get_gray_array(), self.min_changed_pixels)
+            except ScreenshotError:
+                logger.warning('Screenshot failed.')
+
+            if changed_area is not None:
+                previous_array = stack_image.get_gray_array()
+                yield stack_image, changed_area
+
+            wait_for_next_scan(start_time, self.scan_rate, self.end_time)
+            start_time = datetime.datetime.now()
@@ -4,16 +4,23 @@
 
 
 import difflib
+import logging
+from concurrent import futures
 
-import pytesseract
 from PIL import ImageEnhance
 
+from src.core.api.finder.ocr import get_frame_hash, image_to_rows, map_images, ocr_cache
+from src.core.api.finder.polling import FramePoller
 from src.core.api.rectangle import Rectangle
 from src.core.api.save_debug_image.save_image import save_debug_ocr_image
 from src.core.api.screen.display import DisplayCollection
 from src.core.api.screen.screenshot_image import ScreenshotImage
+from src.core.api.settings import Settings
+
+logger = logging.getLogger(__name__)
 
 TRY_RESIZE_IMAGES = 2
+IMAGE_VARIANTS = ['raw', 'contrast']
 OCR_RESULT_COLUMNS_COUNT = 12
 WORD_PROXIMITY = 5
 
@@ -52,38 +59,135 @@ def _replace_multiple(main_string, replace_string, replace_with_string):
 
 def _create_rectangle_from_ocr_data(data, scale):
     """Generates a Rectangle object based on OCR processed data and image scale."""
-    x = int(int(data[6]) / (scale * (1 if scale - 1 == 0 else scale - 1)))
-    y = int(int(data[7]) / (scale * (1 if scale - 1 == 0 else scale - 1)))
-    width = int(int(data[8]) / (scale * (1 if scale - 1 == 0 else scale - 1)))
-    height = int(int(data[9]) / (scale * (1 if scale - 1 == 0 else scale - 1)))
+    x = int(int(data[6]) / scale)
+    y = int(int(data[7]) / scale)
+    width = int(int(data[8]) / scale)
+    height = int(int(data[9]) / scale)
     return Rectangle(x, y, width, height)
 
 
-def _get_first_word(sentence_list, image_list):
+class _WordTable:
+    """Words recognized in all image variants and scales of a search, in recognition order.
+
+    Words are indexed by their text, so a phrase is matched against the table instead of running OCR again for each
+    of its words.
+    """
+
+    def __init__(self):
+        self.words = []
+        self.index = {}
+        self._matches = {}
+
+    def add(self, text: str, box: Rectangle):
+        self.words.append((text, box))
+        self.index.setdefault(text, []).append(box)
+
+    def find(self, word: str) -> list:
+        """Returns the boxes of all recognized words similar to the searched word, in recognition order."""
+        if word not in self._matches:
+            self._matches[word] = {text for text in self.index if _is_word_match(word, text)}
+        keys = self._matches[word]
+        if len(keys) == 0:
+            return []
+        if len(keys) == 1:
+            return list(self.index[next(iter(keys))])
+        return [box for text, box in self.words if text in keys]
+
+
+def _is_word_match(word: str, text: str) -> bool:
+    """Checks if a recognized text is close enough to the searched word."""
+    if word == text:
+        return True
+    cutoff_type = 'digit' if _replace_multiple(word, digit_chars, '').isdigit() else 'string'
+    cutoff = cutoffs[cutoff_type]['max_cutoff']
+    while cutoff >= cutoffs[cutoff_type]['min_cutoff']:
+        if difflib.get_close_matches(word, [text], cutoff=cutoff):
+            return True
+        cutoff -= cutoffs[cutoff_type]['step']
+    return False
+
+
+def _read_words(job) -> list:
+    """Runs OCR once on an image resized by scale. Returns the recognized words and their boxes."""
+    image, scale = job
+    if scale != 1:
+        image = image.resize([image.width * scale, image.height * scale])
+    words = []
+    for d in image_to_rows(image):
+        if len(d) == OCR_RESULT_COLUMNS_COUNT:
+            try:
+                words.append((d[11], _create_rectangle_from_ocr_data(d, scale)))
+            except ValueError:
+                continue
+    return words
+
+
+def _get_image_variant(img: ScreenshotImage, variant: str):
+    """Returns the image preprocessed for an OCR pass."""
+    if variant == 'contrast':
+        return ImageEnhance.Contrast(img.get_gray_image()).enhance(10.0)
+    return img.get_gray_image()
+
+
+def _get_word_table(img: ScreenshotImage, timeout: float = None) -> _WordTable:
+    """Runs a single OCR pass per image variant and scale.
+
+    The passes run in parallel. Results are cached by frame content, so an unchanged region is never read twice.
+
+    :param img: Captured region.
+    :param timeout: Maximum number of seconds to wait for the OCR passes, or None to wait until they finish.
+    :return: _WordTable of the recognized words.
+    :raises concurrent.futures.TimeoutError: If the passes did not finish in time.
+    """
+    passes = [(variant, scale) for variant in IMAGE_VARIANTS for scale in range(1, TRY_RESIZE_IMAGES + 1)]
+    use_cache = Settings.ocr_cache_limit > 0
+    frame_hash = get_frame_hash(img.get_gray_array()) if use_cache else None
+
+    results = {}
+    for ocr_pass in passes:
+        words = ocr_cache.get((frame_hash,) + ocr_pass) if use_cache else None
+        if words is not None:
+            results[ocr_pass] = words
+
+    missing = [ocr_pass for ocr_pass in passes if ocr_pass not in results]
+    if len(missing) > 0:
+        images = {variant: _get_image_variant(img, variant) for variant in set(variant for variant, _ in missing)}
+        jobs = [(images[variant], scale) for variant, scale in missing]
+        for ocr_pass, words in zip(missing, map_images(_read_words, jobs, timeout)):
+            results[ocr_pass] = words
+            if use_cache:
+                ocr_cache.put((frame_hash,) + ocr_pass, words)
+
+    word_table = _WordTable()
+    for ocr_pass in passes:
+        for text, box in results[ocr_pass]:
+            word_table.add(text, box)
+    return word_table
+
+
+def _get_first_word(sentence_list, word_table: _WordTable):
     """Finds all occurrences of the first searched word."""
     first_word = sentence_list.split()[0]
-    cutoff_type = 'digit' if _replace_multiple(first_word, digit_chars, '').isdigit() else 'string'
     words_found = []
-    for index_image, stack_image in enumerate(image_list):
-        for index_scale, scale in enumerate(range(1, TRY_RESIZE_IMAGES + 1)):
-            stack_image = stack_image.resize([stack_image.width * scale, stack_image.height * scale])
-            processed_data = pytesseract.image_to_data(stack_image)
-            for index_data, line in enumerate(processed_data.split('\n')[1:]):
-                d = line.split()
-                if len(d) == OCR_RESULT_COLUMNS_COUNT:
-                    cutoff = cutoffs[cutoff_type]['max_cutoff']
-                    while cutoff >= cutoffs[cutoff_type]['min_cutoff']:
-                        if difflib.get_close_matches(first_word, [d[11]], cutoff=cutoff):
-                            try:
-                                vd = _create_rectangle_from_ocr_data(d, scale)
-                                if not _is_similar_result(words_found, vd.x, vd.y, WORD_PROXIMITY):
-                                    words_found.append(vd)
-                            except ValueError:
-                                continue
-                        cutoff -= cutoffs[cutoff_type]['step']
+    for box in word_table.find(first_word):
+        if not _is_similar_result(words_found, box.x, box.y, WORD_PROXIMITY):
+            words_found.append(Rectangle(box.x, box.y, box.width, box.height))
     return words_found
 
 
+def _get_sentence(first_word: Rectangle, next_words, word_table: _WordTable):
+    """Follows the words of a phrase from its first word. Returns None if the phrase is incomplete."""
+    sentence = [first_word]
+    for word_to_search in next_words:
+        for box in word_table.find(word_to_search):
+            if _is_next_word(sentence[-1], box.x, box.y):
+                sentence.append(box)
+                break
+        else:
+            return None
+    return sentence
+
+
 def _assemble_results(result_list):
     """Merge all Rectangle objects into one that contains them all."""
     from operator import attrgetter
@@ -98,77 +202,42 @@ def _assemble_results(result_list):
     return Rectangle(x, y, width, height)
 
 
-def _text_search(text, region: Rectangle = None, multiple_search=False):
-    """Search text in region or screen."""
-    if region is None:
-        region = DisplayCollection[0].bounds
-
-    img = ScreenshotImage(region=region)
-    raw_gray_image = img.get_gray_image()
-    enhanced_image = ImageEnhance.Contrast(img.get_gray_image()).enhance(10.0)
-    stack_images = [raw_gray_image, enhanced_image]
-    first_word_occurrences = _get_first_word(text, stack_images)
-
-    word_count = len(text.split())
+def _match_text(text, word_table: _WordTable, multiple_search=False):
+    """Matches a phrase against the recognized words. Returns the phrase boxes in image coordinates."""
+    first_word_occurrences = _get_first_word(text, word_table)
 
-    if not multiple_search:
-        if len(first_word_occurrences) == 0:
-            first_word = []
-        else:
-            first_word = [first_word_occurrences[0]]
-    else:
-        first_word = first_word_occurrences
-
-    if word_count == 1:
-        save_debug_ocr_image(text, img, first_word)
-        for result in first_word:
-            result.x += region.x
-            result.y += region.y
-        return first_word
-
-    sentence = []
-    for data in first_word:
-        sentence.append([data])
-
-    for index, word in enumerate(first_word):
-        for index_word, word_to_search in enumerate(text.split()[1:]):
-            found = False
-            cutoff_type = 'digit' if _replace_multiple(word_to_search, digit_chars, '').isdigit() else 'string'
-            for index_image, stack_image in enumerate(stack_images):
-                if not found:
-                    for index_scale, scale in enumerate(range(1, TRY_RESIZE_IMAGES + 1)):
-                        if not found:
-                            stack_image = stack_image.resize([stack_image.width * scale, stack_image.height * scale])
-                            processed_data = pytesseract.image_to_data(stack_image)
-                            for index_data, line in enumerate(processed_data.split('\n')[1:]):
-                                if not found:
-                                    d = line.split()
-                                    if len(d) == OCR_RESULT_COLUMNS_COUNT:
-                                        cutoff = cutoffs[cutoff_type]['max_cutoff']
-                                        while cutoff >= cutoffs[cutoff_type]['min_cutoff'] and not found:
-
-                                            if difflib.get_close_matches(word_to_search, [d[11]], cutoff=cutoff):
-                                                try:
-                                                    vd = _create_rectangle_from_ocr_data(d, scale)
-                                                    if _is_next_word(sentence[index][-1], vd.x, vd.y):
-                                                        sentence[index].append(vd)
-                                                        found = True
-                                                except ValueError:
-                                                    continue
-                                            cutoff -= cutoffs[cutoff_type]['step']
+    next_words = text.split()[1:]
 
     final_result = []
-    for words in sentence:
-        if len(words) == word_count:
-            final_result.append(_assemble_results(words))
+    for word in first_word_occurrences:
+        if len(next_words) == 0:
+            final_result.append(word)
+        else:
+            sentence = _get_sentence(word, next_words, word_table)
+            if sentence is not None:
+                final_result.append(_assemble_results(sentence))
+        if len(final_result) > 0 and not multiple_search:
+            break
+    return final_result
 
-    save_debug_ocr_image(text, img, final_result)
 
-    for result in final_result:
+def _to_screen_coordinates(results, region: Rectangle):
+    for result in results:
         result.x += region.x
         result.y += region.y
+    return results
 
-    return final_result
+
+def _text_search(text, region: Rectangle = None, multiple_search=False):
+    """Search text in region or screen."""
+    if region is None:
+        region = DisplayCollection[0].bounds
+
+    img = ScreenshotImage(region=region)
+    final_result = _match_text(text, _get_word_table(img), multiple_search)
+
+    save_debug_ocr_image(text, img, final_result)
+    return _to_screen_coordinates(final_result, region)
 
 
 def text_find(text, region):
@@ -177,3 +246,41 @@ def text_find(text, region):
 
 def text_find_all(text, region):
     return _text_search(text, region, True)
+
+
+def text_wait(text, timeout: float = None, region: Rectangle = None):
+    """Wait for text to appear in a region or screen.
+
+    The region is captured Settings.wait_scan_rate times per second and OCR runs again only when the capture changed.
+    An OCR attempt still running at the deadline is abandoned. One debug image is saved per call, for the final
+    attempt.
+
+    :param text: Searched text.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param region: Rectangle object in order to minimize the area.
+    :return: List with the first text occurrence, or an empty list.
+    """
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    if region is None:
+        region = DisplayCollection[0].bounds
+
+    poller = FramePoller(region, timeout, Settings.wait_scan_rate)
+    last_image = None
+    for img, changed_area in poller:
+        try:
+            word_table = _get_word_table(img, poller.time_remaining())
+        except futures.TimeoutError:
+            logger.debug('OCR of text \'%s\' did not finish before the timeout.' % text)
+            break
+        last_image = img
+
+        final_result = _match_text(text, word_table)
+        if len(final_result) > 0:
+            save_debug_ocr_image(text, img, final_result)
+            return _to_screen_coordinates(final_result, region)
+
+    if last_image is not None:
+        save_debug_ocr_image(text, last_image, [])
+    return []
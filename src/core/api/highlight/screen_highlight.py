@@ -9,7 +9,8 @@ from src.core.api.enums import Color
 from src.core.api.highlight.highlight_circle import HighlightCircle
 from src.core.api.highlight.highlight_rectangle import HighlightRectangle
 from src.core.api.settings import Settings
-from src.core.api.os_helpers import MULTI_MONITOR_AREA, OSHelper
+from src.core.api.os_helpers import OSHelper
+from src.core.api.screen.display import DisplayCollection
 
 
 def _draw_circle(canvas, x, y, r, **kwargs):
@@ -53,8 +54,9 @@ class ScreenHighlight(object):
     def __init__(self):
         self.root = Tk()
         self.root.overrideredirect(1)
-        s_width = MULTI_MONITOR_AREA['width']
-        s_height = MULTI_MONITOR_AREA['height']
+        virtual_screen = DisplayCollection.get_virtual_screen()
+        s_width = virtual_screen['width']
+        s_height = virtual_screen['height']
 
         self.root.wm_attributes('-topmost', True)
 
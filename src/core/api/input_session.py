@@ -0,0 +1,133 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from src.core.api.os_helpers import OSHelper
+from src.core.api.settings import Settings
+from src.core.util.path_manager import PathManager
+
+logger = logging.getLogger(__name__)
+
+
+class InputSession:
+    """Mouse and keyboard used by one test session.
+
+    A session without display name uses pynput and pyautogui, which act on the default display of the process. A
+    session with a display name, like ':1', opens its own X connection and sends XTest events to that display only, so
+    several sessions can drive different displays from the same host or process.
+
+    The mouse and keyboard APIs use the session returned by get_input_session(). On Linux, parallel run workers and runs
+    with Settings.fast_input use a session bound to the DISPLAY display by default, which sends whole key sequences as
+    one batch of XTest events. Other code can bind a session to the current thread with
+    set_input_session() or the input_session() context manager.
+    """
+
+    def __init__(self, display_name: str = None):
+        self.display_name = display_name
+        self._display = None
+        self._mouse = None
+        self._keyboard = None
+        self._lock = threading.Lock()
+
+    def get_mouse(self):
+        """Returns the mouse controller of the session, with the interface of pynput's mouse Controller."""
+        if self._mouse is None:
+            with self._lock:
+                if self._mouse is None:
+                    if self.display_name is None:
+                        from pynput.mouse import Controller as MouseController
+                        self._mouse = MouseController()
+                    else:
+                        from src.core.api.mouse.Xmouse import XMouseController
+                        self._mouse = XMouseController(self._get_display())
+        return self._mouse
+
+    def get_keyboard(self):
+        """Returns the keyboard of the session, with the keyDown, keyUp, isValidKey and typewrite functions of
+        pyautogui.
+        """
+        if self._keyboard is None:
+            with self._lock:
+                if self._keyboard is None:
+                    if self.display_name is None:
+                        import pyautogui
+                        self._keyboard = pyautogui
+                    else:
+                        from src.core.api.keyboard.Xkeyboard import XKeyboard
+                        self._keyboard = XKeyboard(self._get_display())
+        return self._keyboard
+
+    def close(self):
+        """Closes the X connection of the session, if it opened one."""
+        with self._lock:
+            if self._display is not None:
+                self._display.close()
+            self._display = None
+            self._mouse = None
+            self._keyboard = None
+
+    def _get_display(self):
+        if self._display is None:
+            from Xlib.display import Display
+            logger.debug('Opening input connection to display %s.' % self.display_name)
+            self._display = Display(self.display_name)
+        return self._display
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+_thread_sessions = threading.local()
+
+
+def _create_default_session() -> InputSession:
+    """Creates the session used by threads without their own session.
+
+    On Linux, parallel run workers and runs with Settings.fast_input send their input with XTest to the display set in
+    DISPLAY.
+    """
+    if OSHelper.is_linux() and 'DISPLAY' in os.environ and \
+            (PathManager.get_worker_id() is not None or Settings.fast_input):
+        logger.debug('Sending input to display %s with XTest.' % os.environ['DISPLAY'])
+        return InputSession(os.environ['DISPLAY'])
+    return InputSession()
+
+
+def get_input_session() -> InputSession:
+    """Returns the input session of the current thread, or the default session."""
+    global _default_session
+    session = getattr(_thread_sessions, 'session', None)
+    if session is not None:
+        return session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = _create_default_session()
+    return _default_session
+
+
+def set_input_session(session: InputSession or None):
+    """Binds an input session to the current thread. None restores the default session."""
+    _thread_sessions.session = session
+
+
+@contextmanager
+def input_session(display_name: str):
+    """Sends the mouse and keyboard input of the current thread to an X display, within a with block.
+
+    :param display_name: X display name, like ':1'.
+    :return: The InputSession, closed when the block exits.
+    """
+    previous = getattr(_thread_sessions, 'session', None)
+    session = InputSession(display_name)
+    set_input_session(session)
+    try:
+        yield session
+    finally:
+        set_input_session(previous)
+        session.close()
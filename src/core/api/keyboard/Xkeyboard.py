@@ -2,24 +2,38 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import logging
 import os
+import time
 
 from Xlib.display import Display
 from Xlib import X
 from Xlib.ext.xtest import fake_input
 import Xlib.XK
 
+from src.core.api.keyboard.key import Key
+
+logger = logging.getLogger(__name__)
+
+KEY_NAMES = {key.value.label: key.value.x11key for key in Key if key.value.x11key is not None}
+# Other key names accepted by pyautogui, so that both keyboard backends take the same strings.
+KEY_NAMES.update({'enter': 'Return', 'return': 'Return', 'win': 'Super_L', 'winleft': 'Super_L',
+                  'command': 'Super_L', 'pgdn': 'Page_Down', 'pgup': 'Page_Up', 'delete': 'Delete',
+                  '\r': 'Return', '\b': 'BackSpace', 'tab': 'Tab', 'escape': 'Escape', '\\e': 'Escape',
+                  'space': 'space', 'prtsc': 'Print', 'prtscr': 'Print'})
+
 
 class Xscreen:
 
-    def __init__(self):
+    def __init__(self, display: Display = None):
         """
         Initializing a X Display that will be used for screenshot , keyboard and mouse
         actions in a framebuffer environment
 
+        :param display: Connection to use. By default, a new connection to the DISPLAY environment variable is opened.
         """
 
-        self.display = Display(os.environ['DISPLAY'])
+        self.display = display if display is not None else Display(os.environ['DISPLAY'])
 
     def _screen_size(self):
         """
@@ -31,10 +45,13 @@ class Xscreen:
 
 
 class XKeyboard(Xscreen):
+    """Keyboard input sent with XTest on an explicit X display connection.
 
-    def __init__(self):
+    Methods follow the pyautogui names, so an XKeyboard can replace the pyautogui module as keyboard backend.
+    """
 
-        self.display = Xscreen()
+    def __init__(self, display: Display = None):
+        Xscreen.__init__(self, display)
 
     def keyDown(self, key):
         """
@@ -48,23 +65,7 @@ class XKeyboard(Xscreen):
         Returns:
           None
         """
-        if self.keyboardMapping(key) is None:
-            return
-
-        if type(key) == int:
-            fake_input(self.display, X.KeyPress, key)
-            self.display.sync()
-            return
-
-        needsShift = isShiftCharacter(key)
-        if needsShift:
-            fake_input(self.display, X.KeyPress, self.keyboardMapping('shift'))
-
-        fake_input(self.display, X.KeyPress, self.keyboardMapping(key))
-
-        if needsShift:
-            fake_input(self.display, X.KeyRelease, self.keyboardMapping('shift'))
-        self.display.sync()
+        self.send_key_events(self.get_key_events(key, release=False))
 
     def keyUp(self, key):
         """
@@ -78,25 +79,147 @@ class XKeyboard(Xscreen):
           None
         """
 
-        if self.keyboardMapping(key) is None:
+        self.send_key_events(self.get_key_events(key, press=False))
+
+    def typewrite(self, message, interval: float = 0.0):
+        """
+        Types the characters of a string, or the keys of a list of key names.
+
+        Without interval, the whole message is sent as one batch of events.
+
+        :param message: String or list of key names.
+        :param interval: Seconds to wait after each key.
+        """
+        if not interval:
+            self.send_key_events([event for key in message for event in self.get_key_events(key)])
             return
 
-        if type(key) == int:
-            keycode = key
-        else:
-            keycode = self.keyboardMapping(key)
+        for key in message:
+            self.send_key_events(self.get_key_events(key))
+            time.sleep(interval)
+
+    def hotkey(self, *keys, **kwargs):
+        """
+        Presses the keys in order and releases them in reverse order, as one batch of events.
 
-        fake_input(self.display, X.KeyRelease, keycode)
+        :param keys: Key labels, X keysym names or single characters.
+        :param kwargs: Ignored, accepted for compatibility with pyautogui.hotkey.
+        """
+        keycodes = [keycode for keycode in (self.keyboardMapping(key) for key in keys) if keycode is not None]
+        self.send_key_events([(keycode, True) for keycode in keycodes] +
+                             [(keycode, False) for keycode in reversed(keycodes)])
+
+    def get_key_events(self, key, press: bool = True, release: bool = True) -> list:
+        """
+        Returns the events that press and/or release a key, with shift held around the press of shifted characters.
+
+        :param key: Keycode, Key label, X keysym name or single character.
+        :param press: Whether to press the key.
+        :param release: Whether to release the key.
+        :return: List of (keycode, is_press) tuples, empty if the key is not mapped on this display.
+        """
+        keycode = self.keyboardMapping(key)
+        if keycode is None:
+            return []
+
+        events = [(keycode, True)] if press else []
+        if release:
+            events.append((keycode, False))
+        if press and type(key) != int and self.isShiftCharacter(key):
+            shift = self.keyboardMapping('shift')
+            events = [(shift, True)] + events + [(shift, False)]
+        return events
+
+    def send_key_events(self, events: list):
+        """
+        Sends key events to the X server and waits until it processed all of them.
+
+        :param events: List of (keycode, is_press) tuples.
+        """
+        for keycode, is_press in events:
+            fake_input(self.display, X.KeyPress if is_press else X.KeyRelease, keycode)
         self.display.sync()
 
-    def keyboardMapping(self, iriskey: type):
+    def isValidKey(self, key) -> bool:
+        """Returns True if the key can be typed on this display."""
+        return self.keyboardMapping(key) is not None
+
+    def keyboardMapping(self, iriskey):
+        """
+        Returns the keycode of a key on this display, or None if it is not mapped.
+
+        :param iriskey: Keycode, Key label, X keysym name or single character.
+        """
+        if type(iriskey) == int:
+            return iriskey
+        keycode = self.display.keysym_to_keycode(_get_keysym(iriskey))
+        return keycode if keycode else None
 
-        return self.display.keysym_to_keycode(Xlib.XK.string_to_keysym(iriskey))
+    def isShiftCharacter(self, character) -> bool:
+        """
+        Returns True if the key character is uppercase or shifted.
+        """
+        keysym = _get_keysym(character)
+        keycode = self.display.keysym_to_keycode(keysym)
+        return bool(keycode) and self.display.keycode_to_keysym(keycode, 0) != keysym
 
 
-@staticmethod
-def isShiftCharacter(character):
-    """
-    Returns True if the key character is uppercase or shifted.
+def _get_keysym(key: str) -> int:
+    """Returns the X keysym of a Key label, an X keysym name or a single character."""
+    if key in KEY_NAMES:
+        return Xlib.XK.string_to_keysym(KEY_NAMES[key])
+    if len(key) == 1:
+        code = ord(key)
+        # Latin-1 keysyms are the character codes, other characters use the Unicode keysym range.
+        return code if code < 0x100 else 0x01000000 | code
+    return Xlib.XK.string_to_keysym(key)
+
+
+def benchmark_typing(text: str = 'The quick brown fox jumps over the lazy dog 0123456789!', iterations: int = 5) -> dict:
+    """Measures the time until a window of the current display received all key events of a text.
+
+    The text is sent once key by key, with a sync after each event, and once as a single batch.
+
+    :param text: Text to type.
+    :param iterations: Number of times the text is typed with each method.
+    :return: Dictionary of method name and average seconds per text.
     """
-    return character.isupper() or character in '~!@#$%^&*()_+{}|:"<>?'
+    display = Display(os.environ['DISPLAY'])
+    screen = display.screen()
+    window = screen.root.create_window(0, 0, 200, 100, 0, screen.root_depth,
+                                       event_mask=X.KeyPressMask | X.KeyReleaseMask | X.StructureNotifyMask)
+    window.map()
+    while display.next_event().type != X.MapNotify:
+        pass
+    window.set_input_focus(X.RevertToParent, X.CurrentTime)
+    display.sync()
+
+    keyboard = XKeyboard(display)
+    events = [event for key in text for event in keyboard.get_key_events(key)]
+
+    def key_by_key():
+        for key in text:
+            keyboard.keyDown(key)
+            keyboard.keyUp(key)
+
+    results = {}
+    try:
+        for name, send in (('key by key', key_by_key), ('batched', lambda: keyboard.send_key_events(events))):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                send()
+                received = 0
+                while received < len(events):
+                    if display.next_event().type in (X.KeyPress, X.KeyRelease):
+                        received += 1
+            results[name] = (time.perf_counter() - start) / iterations
+            logger.info('%s: %.2f ms for %s characters' % (name, results[name] * 1000, len(text)))
+    finally:
+        window.destroy()
+        display.close()
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    benchmark_typing()
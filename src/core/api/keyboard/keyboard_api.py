@@ -12,13 +12,16 @@ import pyautogui
 import pyperclip
 
 from src.core.api.errors import FindError
+from src.core.api.input_session import get_input_session
 from src.core.api.keyboard.key import KeyModifier, Key
 from src.core.api.os_helpers import OSHelper
+from src.core.api.screen.screenshot_image import invalidate_shared_frames
 from src.core.api.settings import Settings
 from src.core.util.arg_parser import logger
 from src.core.util.system import shutdown_process
 
 DEFAULT_KEY_SHORTCUT_DELAY = 0.1
+PASTE_CLEAR_DELAY = 0.2
 pyautogui.FAILSAFE = False
 
 
@@ -28,15 +31,17 @@ def key_down(key):
     :param key: The key to be pressed down.
     :return: None.
     """
+    keyboard = get_input_session().get_keyboard()
     if isinstance(key, Key):
-        pyautogui.keyDown(key.value.label)
+        keyboard.keyDown(key.value.label)
     elif isinstance(key, str):
-        if pyautogui.isValidKey(key):
-            pyautogui.keyDown(key)
+        if keyboard.isValidKey(key):
+            keyboard.keyDown(key)
         else:
             raise ValueError("Unsupported Key input.")
     else:
         raise ValueError("Unsupported Key input.")
+    invalidate_shared_frames()
 
 
 def key_up(key):
@@ -45,15 +50,17 @@ def key_up(key):
     :param key: The key to be released up.
     :return: None.
     """
+    keyboard = get_input_session().get_keyboard()
     if isinstance(key, Key):
-        pyautogui.keyUp(key.value.label)
+        keyboard.keyUp(key.value.label)
     elif isinstance(key, str):
-        if pyautogui.isValidKey(key):
-            pyautogui.keyUp(key)
+        if keyboard.isValidKey(key):
+            keyboard.keyUp(key)
         else:
             raise ValueError("Unsupported Key input.")
     else:
         raise ValueError("Unsupported Key input.")
+    invalidate_shared_frames()
 
 
 def type(text: Key or str = None, modifier=None, interval: int = None):
@@ -78,14 +85,20 @@ def type(text: Key or str = None, modifier=None, interval: int = None):
 
             logger.debug('Scenario 2: normal key or text block.')
             logger.debug('Text: %s' % text)
-            pyautogui.typewrite(text, interval)
+            if _is_paste_allowed(text, interval):
+                paste(text)
+            else:
+                get_input_session().get_keyboard().typewrite(text, interval)
+                invalidate_shared_frames()
     else:
         logger.debug('Scenario 3: combination of modifiers and other keys.')
         modifier_keys = get_active_modifiers(modifier)
         num_keys = len(modifier_keys)
         logger.debug('Modifiers (%s): %s ' % (num_keys, ' '.join(key.name for key in modifier_keys)))
         logger.debug('text: %s' % text)
-        if num_keys == 1:
+        if Settings.fast_input and num_keys in (1, 2):
+            hotkey(*modifier_keys, text)
+        elif num_keys == 1:
             key_down(modifier_keys[0])
             time.sleep(DEFAULT_KEY_SHORTCUT_DELAY)
             key_down(text)
@@ -112,6 +125,34 @@ def type(text: Key or str = None, modifier=None, interval: int = None):
         Settings.type_delay = Settings.DEFAULT_TYPE_DELAY
 
 
+def hotkey(*keys):
+    """Presses the keys in order and releases them in reverse order, without delays between keys.
+
+    :param keys: Keys or key names.
+    :return: None.
+    """
+    keyboard = get_input_session().get_keyboard()
+    key_names = []
+    for key in keys:
+        if isinstance(key, Key):
+            key_names.append(key.value.label)
+        elif isinstance(key, str) and keyboard.isValidKey(key):
+            key_names.append(key)
+        else:
+            raise ValueError("Unsupported Key input.")
+    keyboard.hotkey(*key_names)
+    invalidate_shared_frames()
+
+
+def _is_paste_allowed(text, interval) -> bool:
+    """Returns True if type() can paste the text instead of typing it.
+
+    Line breaks are typed as Enter key presses, so texts containing them are always typed.
+    """
+    return isinstance(text, str) and 0 < Settings.type_paste_length <= len(text) and not interval and \
+        '\n' not in text and '\r' not in text
+
+
 def paste(text: str):
     """
     :param text: Text to be pasted.
@@ -141,6 +182,10 @@ def paste(text: str):
     else:
         type(text='v', modifier=KeyModifier.CTRL)
 
+    if Settings.fast_input:
+        # The application requests the clipboard contents after it received the shortcut, which is sent without
+        # delays in fast input mode.
+        time.sleep(PASTE_CLEAR_DELAY)
     pyperclip.copy('')
 
 
@@ -7,6 +7,8 @@ class Location:
     """Class handle single points on the screen directly by its position (x, y). It is mainly used in the actions on a
     region, to directly denote the click point. It contains methods, to move a point around on the screen."""
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: int = 0, y: int = 0):
         self.x = x
         self.y = y
@@ -4,35 +4,36 @@
 
 
 from Xlib import X
+from Xlib.display import Display
 from Xlib.ext.xtest import fake_input
 
-from core.api.location import Location
-from core.keyboard.Xkeyboard import Xscreen
+from src.core.api.location import Location
+from src.core.api.keyboard.Xkeyboard import Xscreen
 
 
 class XMouse(Xscreen):
 
-    def __init__(self):
-        self.display = Xscreen()
+    def __init__(self, display: Display = None):
+        Xscreen.__init__(self, display)
         self.MOUSE_BUTTONS = {'left': 1, 'middle': 2, 'right': 3, 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 7}
 
-    def click(self, location: Location, button: str):
+    def click(self, location: Location = None, button: str = 'left'):
 
         """
         Performs a click
 
         :param button :'left','middle','right'
-        :param location :x,y coordinates where to click
+        :param location :x,y coordinates where to click, or None to click at the current position
 
         """
 
         assert button in self.MOUSE_BUTTONS.keys(), "button argument not in ('left', 'middle', 'right', 4, 5, 6, 7)"
         button = self.MOUSE_BUTTONS[button]
 
-        self._mouseDown(location, button)
-        self._mouseUp(location, button)
+        self.mouseDown(location, button)
+        self.mouseUp(location, button)
 
-    def _vertical_scroll(self, clicks: int, location: Location = None):
+    def vertical_scroll(self, clicks: int, location: Location = None):
 
         """
         Performs a vertical mouse movement
@@ -52,7 +53,7 @@ class XMouse(Xscreen):
         for i in range(abs(clicks)):
             self.click(location, button=button)
 
-    def horizontal_scroll(self, clicks: int, location: Location):
+    def horizontal_scroll(self, clicks: int, location: Location = None):
         """
         Performs a horizontal mouse movement
 
@@ -71,7 +72,7 @@ class XMouse(Xscreen):
         for i in range(abs(clicks)):
             self.click(location, button=button)
 
-    def scroll(self, clicks: int, location: Location):
+    def scroll(self, clicks: int, location: Location = None):
         """
         Performs a scroll mouse movement
 
@@ -89,32 +90,34 @@ class XMouse(Xscreen):
         :param location :x,y coordinates where to click
 
         """
-        fake_input(self.display, X.MotionNotify, x=location.x, y=location.y)
+        fake_input(self.display, X.MotionNotify, x=int(location.x), y=int(location.y))
         self.display.sync()
 
-    def _mouseDown(self, location: Location, button: str):
+    def mouseDown(self, location: Location = None, button: str = 'left'):
         """
         Mouse button press
 
-        :param location :x,y coordinates where to click
+        :param location :x,y coordinates where to click, or None to press at the current position
         :param button 'left','middle','right'
 
         """
-        self.moveTo(location)
+        if location is not None:
+            self.moveTo(location)
         assert button in self.MOUSE_BUTTONS.keys(), "button argument not in ('left', 'middle', 'right', 4, 5, 6, 7)"
         button = self.MOUSE_BUTTONS[button]
         fake_input(self.display, X.ButtonPress, button)
         self.display.sync()
 
-    def _mouseUp(self, location: Location, button: str):
+    def mouseUp(self, location: Location = None, button: str = 'left'):
         """
         Mouse button Up
 
-        :param location :x,y coordinates where to click
+        :param location :x,y coordinates where to click, or None to release at the current position
         :param button 'left','middle','right'
 
         """
-        self.moveTo(location)
+        if location is not None:
+            self.moveTo(location)
         assert button in self.MOUSE_BUTTONS.keys(), "button argument not in ('left', 'middle', 'right', 4, 5, 6, 7)"
         button = self.MOUSE_BUTTONS[button]
         fake_input(self.display, X.ButtonRelease, button)
@@ -127,3 +130,35 @@ class XMouse(Xscreen):
         coord = self.display.screen().root.query_pointer()._data
         position = (coord["root_x"], coord["root_y"])
         return position
+
+
+class XMouseController:
+    """Mouse controller with the interface of pynput's mouse Controller, bound to an X display connection.
+
+    Buttons are pynput Button values, or any object whose name is 'left', 'middle' or 'right'.
+    """
+
+    def __init__(self, display: Display = None):
+        self._mouse = XMouse(display)
+
+    @property
+    def position(self):
+        return self._mouse.position()
+
+    @position.setter
+    def position(self, position):
+        self._mouse.moveTo(Location(position[0], position[1]))
+
+    def press(self, button):
+        self._mouse.mouseDown(button=button.name)
+
+    def release(self, button):
+        self._mouse.mouseUp(button=button.name)
+
+    def click(self, button, count: int = 1):
+        for _ in range(count):
+            self._mouse.click(button=button.name)
+
+    def scroll(self, dx: int, dy: int):
+        self._mouse.vertical_scroll(dy)
+        self._mouse.horizontal_scroll(dx)
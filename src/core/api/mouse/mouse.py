@@ -7,9 +7,9 @@ from src.core.api.enums import Alignment
 from src.core.api.errors import FindError
 from src.core.api.finder.image_search import image_find
 from src.core.api.finder.pattern import Pattern
+from src.core.api.location import Location
 from src.core.api.mouse.mouse_controller import Mouse
 from src.core.api.rectangle import Rectangle
-import pyautogui
 
 try:
     from src.core.api.mouse.mouse_controller import Button
@@ -145,7 +145,7 @@ def drag_drop(drag_from: Pattern or str, drop_to: Pattern or str, region: Rectan
 def mouse_reset():
     """Reset Mouse coordinates to top left corner."""
 
-    pyautogui.moveTo(0,0)
+    Mouse().move(Location(0, 0), 0)
 
 def scroll_down(dy: int = None, iterations: int = 1):
     """Scroll down mouse event."""
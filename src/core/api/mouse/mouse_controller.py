@@ -3,12 +3,29 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
+import logging
 import time
 
-from pynput.mouse import Controller as MouseController, Button
+import numpy as np
+from pynput.mouse import Button
 
+from src.core.api.errors import ScreenshotError
+from src.core.api.input_session import get_input_session
 from src.core.api.settings import Settings
 from src.core.api.location import Location
+from src.core.api.rectangle import Rectangle
+from src.core.api.screen.display import DisplayCollection
+from src.core.api.screen.screenshot_image import ScreenshotImage, invalidate_shared_frames
+
+logger = logging.getLogger(__name__)
+
+FAST_MOVE_TIMEOUT = 0.5
+FAST_MOVE_POLL_INTERVAL = 0.005
+FAST_DRAG_STEPS = 4
+FAST_DRAG_STEP_DELAY = 0.05
+FAST_DROP_TIMEOUT = 0.5
+FAST_DROP_POLL_INTERVAL = 0.02
+DROP_AREA_SIZE = 64
 
 
 def _get_point_on_line(x1, y1, x2, y2, n):
@@ -20,21 +37,49 @@ def _get_point_on_line(x1, y1, x2, y2, n):
     return x, y
 
 
+def _get_drop_area(location: Location) -> (int, Rectangle) or None:
+    """Returns the display index and the area around a drop location, within the bounds of its display."""
+    for screen_id, display in enumerate(DisplayCollection):
+        bounds = display.bounds
+        if bounds.x <= location.x < bounds.x + bounds.width and bounds.y <= location.y < bounds.y + bounds.height:
+            x = max(int(location.x) - DROP_AREA_SIZE // 2, bounds.x)
+            y = max(int(location.y) - DROP_AREA_SIZE // 2, bounds.y)
+            x_end = min(int(location.x) + DROP_AREA_SIZE // 2, bounds.x + bounds.width)
+            y_end = min(int(location.y) + DROP_AREA_SIZE // 2, bounds.y + bounds.height)
+            return screen_id, Rectangle(x, y, x_end - x, y_end - y)
+    return None
+
+
+def _capture_drop_area(drop_area):
+    """Returns a new gray capture of a drop area, or None if it cannot be captured."""
+    if drop_area is None:
+        return None
+    screen_id, region = drop_area
+    try:
+        return ScreenshotImage(region=region, screen_id=screen_id, shared=False).get_gray_array().copy()
+    except ScreenshotError:
+        return None
+
+
 class Mouse:
     def __init__(self):
-        self.mouse = MouseController()
+        self.mouse = get_input_session().get_mouse()
 
     def move(self, location: Location = None, duration: float = None):
-        """Mouse move with tween.
+        """Mouse move with tween, or in a single step if Settings.fast_input is set.
 
         :param location: Location , image name or Pattern.
-        :param duration: Speed of mouse movement from current mouse location to target.
+        :param duration: Speed of mouse movement from current mouse location to target. Ignored in fast input mode.
         :return: None.
         """
 
         if location is None:
             location = Location(0, 0)
 
+        if Settings.fast_input:
+            self._warp(location.x, location.y)
+            return
+
         if duration is None:
             duration = Settings.move_mouse_delay
 
@@ -60,6 +105,7 @@ class Mouse:
                 tween_y = int(round(tween_y))
                 set_mouse_position(tween_x, tween_y)
                 time.sleep(sleep_amount)
+            invalidate_shared_frames()
 
         return smooth_move_mouse(
             self.mouse.position[0],
@@ -68,6 +114,18 @@ class Mouse:
             location.y
         )
 
+    def _warp(self, x: int, y: int):
+        """Moves the pointer in one step and waits until it reports the new position."""
+        x, y = int(round(x)), int(round(y))
+        self.mouse.position = (x, y)
+        invalidate_shared_frames()
+        deadline = time.monotonic() + FAST_MOVE_TIMEOUT
+        while tuple(int(round(value)) for value in self.mouse.position) != (x, y):
+            if time.monotonic() > deadline:
+                logger.debug('Pointer did not reach (%s, %s).' % (x, y))
+                return
+            time.sleep(FAST_MOVE_POLL_INTERVAL)
+
     def press(self, location: Location = None, duration: float = None, button: Button = Button.left):
         """Mouse press.
 
@@ -78,6 +136,7 @@ class Mouse:
         """
         self.move(location, duration)
         self.mouse.press(button)
+        invalidate_shared_frames()
 
     def release(self, location: Location = None, duration: float = None, button: Button = Button.left):
         """Mouse press.
@@ -89,6 +148,7 @@ class Mouse:
         """
         self.move(location, duration)
         self.mouse.release(button)
+        invalidate_shared_frames()
 
     def general_click(self, location: Location = None, duration: float = None, button: Button = Button.left,
                       clicks: int = 1):
@@ -102,6 +162,7 @@ class Mouse:
         """
         self.move(location, duration)
         self.mouse.click(button, clicks)
+        invalidate_shared_frames()
 
     def drag_and_drop(self, start: Location, end: Location, duration: float = None):
         """Mouse drag and drop.
@@ -111,6 +172,10 @@ class Mouse:
         :param duration: Speed of mouse movement to the drag and drop location.
         :return: None.
         """
+        if Settings.fast_input:
+            self._fast_drag_and_drop(start, end)
+            return
+
         time.sleep(Settings.UI_DELAY)
         self.move(start, duration)
         time.sleep(Settings.delay_before_mouse_down)
@@ -119,6 +184,38 @@ class Mouse:
         self.move(end, duration)
         time.sleep(Settings.delay_before_drop)
         self.mouse.release(Button.left)
+        invalidate_shared_frames()
+
+    def _fast_drag_and_drop(self, start: Location, end: Location):
+        """Drag and drop without the fixed delays of animated mode.
+
+        Toolkits start a drag session after several motion events with the button down, so the drop location is
+        reached in a few confirmed steps, FAST_DRAG_STEP_DELAY apart. The button is released once the screen around
+        the drop location changed, for example to show drop feedback, or after FAST_DROP_TIMEOUT seconds.
+        """
+        drop_area = _get_drop_area(end)
+        reference = _capture_drop_area(drop_area)
+
+        self._warp(start.x, start.y)
+        self.mouse.press(Button.left)
+        for step in range(1, FAST_DRAG_STEPS + 1):
+            time.sleep(FAST_DRAG_STEP_DELAY)
+            self._warp(*_get_point_on_line(start.x, start.y, end.x, end.y, step / FAST_DRAG_STEPS))
+
+        deadline = time.monotonic() + FAST_DROP_TIMEOUT
+        changed = False
+        while reference is not None and not changed and time.monotonic() < deadline:
+            time.sleep(FAST_DROP_POLL_INTERVAL)
+            current = _capture_drop_area(drop_area)
+            if current is None:
+                break
+            changed = not np.array_equal(reference, current)
+
+        if not changed:
+            logger.debug('No screen change around the drop location (%s, %s).' % (end.x, end.y))
+            time.sleep(max(deadline - time.monotonic(), 0))
+        self.mouse.release(Button.left)
+        invalidate_shared_frames()
 
     def scroll(self, dx: int = None, dy: int = None, iterations: int = 1):
         """Sends scroll events.
@@ -136,4 +233,6 @@ class Mouse:
 
         for i in range(iterations):
             self.mouse.scroll(dx, dy)
+            invalidate_shared_frames()
             time.sleep(0.5)
+
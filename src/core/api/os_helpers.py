@@ -6,19 +6,16 @@
 import multiprocessing
 
 import mozinfo
-import mss
 
 from src.core.api.enums import OSPlatform
 from src.core.api.errors import APIHelperError
+from src.core.api.screen.display import DisplayCollection
 
 OS_NAME = mozinfo.os
 OS_VERSION = mozinfo.os_version
 OS_BITS = mozinfo.bits
 PROCESSOR = mozinfo.processor
 
-MONITORS = mss.mss().monitors[1:]
-MULTI_MONITOR_AREA = mss.mss().monitors[0]
-
 
 class OSHelper:
 
@@ -28,18 +25,12 @@ class OSHelper:
     @staticmethod
     def is_high_def_display():
         """Checks if the primary display is high definition."""
-        main_display = MONITORS[0]
-        screenshot = mss.mss().grab(main_display)
-        if screenshot.width > main_display['width'] or screenshot.height > main_display['height']:
-            return True
-        return False
+        return DisplayCollection[0].scale > 1
 
     @staticmethod
     def get_display_factor():
-        main_display = MONITORS[0]
-        screenshot = mss.mss().grab(main_display)
-        display_factor = screenshot.width / screenshot.height
-        return display_factor
+        bounds = DisplayCollection[0].bounds
+        return bounds.width / bounds.height
 
     @staticmethod
     def get_os():
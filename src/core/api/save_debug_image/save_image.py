@@ -3,14 +3,18 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
 
+import atexit
 import datetime
 import logging
 import os
+import queue
 import re
+import threading
 
 import cv2
 import numpy as np
 
+from src.core.api.settings import Settings
 from src.core.util.path_manager import PathManager
 
 try:
@@ -20,38 +24,132 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+DEBUG_QUEUE_SIZE = 16
 
-def save_debug_image(needle, haystack, locations):
-    """Saves input Image for debug.
 
-    :param Image || None needle: Input needle image that needs to be highlighted.
-    :param haystack: Input Region as Image.
-    :param List[Location] || Location locations: Location or list of Location as coordinates.
-    :return: None.
+class _DebugImageWriter:
+    """Renders and writes debug images on a background thread, so find operations never wait for JPEG encoding.
+
+    The queue is bounded. When it is full, the oldest pending image is dropped in favour of the newest one.
     """
 
-    w, h = needle.get_size()
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=DEBUG_QUEUE_SIZE)
+        self._created_directories = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, render, path: str, file_name: str):
+        """Queues a debug image.
+
+        :param render: Callable returning the image array to write.
+        :param path: Debug image directory.
+        :param file_name: Full path of the image file.
+        :return: None.
+        """
+        self._start()
+        while True:
+            try:
+                self._queue.put_nowait((render, path, file_name))
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                    self._queue.task_done()
+                    logger.debug('Debug image queue is full, dropping %s' % dropped[2])
+                except queue.Empty:
+                    pass
+
+    def flush(self):
+        """Blocks until all queued debug images are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='DebugImageWriter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            render, path, file_name = self._queue.get()
+            try:
+                if path not in self._created_directories:
+                    os.makedirs(path, exist_ok=True)
+                    self._created_directories.add(path)
+                cv2.imwrite(file_name, render(), [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+            except Exception as e:
+                logger.warning('Unable to save debug image %s: %s' % (file_name, e))
+            finally:
+                self._queue.task_done()
+
+
+_writer = _DebugImageWriter()
+_counted_path = None
+_image_count = 0
+atexit.register(_writer.flush)
+
+
+def flush_debug_images():
+    """Waits until all pending debug images are written to disk."""
+    _writer.flush()
+
+
+def _submit_debug_image(render, found: bool):
+    """Queues a debug image for the current test, unless disabled or over the per test limit.
+
+    Only the images of the current test directory are counted. The count restarts when the next test begins.
+    """
+    global _counted_path, _image_count
+    if not Settings.save_debug_images:
+        return
 
     path = PathManager.get_debug_image_directory()
+    if path != _counted_path:
+        _counted_path = path
+        _image_count = 0
+    if _image_count >= Settings.debug_images_limit:
+        if _image_count == Settings.debug_images_limit:
+            logger.debug('Reached the limit of %s debug images for this test.' % _image_count)
+            _image_count += 1
+        return
+    _image_count += 1
 
     timestamp_str = re.sub('[ :.-]', '_', str(datetime.datetime.now()))
-    resolution_str = '_not_found' if len(locations) == 0 else '_found'
+    resolution_str = '_found' if found else '_not_found'
 
     temp_f = timestamp_str + resolution_str
 
     file_name = '%s.jpg' % os.path.join(path, temp_f)
+    _writer.submit(render, path, file_name)
+
+
+def save_debug_image(needle, haystack, locations):
+    """Saves input Image for debug.
+
+    :param Image || None needle: Input needle image that needs to be highlighted.
+    :param haystack: Input Region as Image.
+    :param List[Location] || Location locations: Location or list of Location as coordinates.
+    :return: None.
+    """
+    gray_array = haystack.get_gray_array()
+    points = [(loc.x, loc.y) for loc in locations]
+    _submit_debug_image(lambda: _render_debug_image(needle, gray_array, points), len(points) > 0)
+
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+def _render_debug_image(needle, gray_array, points):
+    """Draws the found points, or the missing needle, over a copy of the haystack."""
+    w, h = needle.get_size()
 
     not_found_txt = ' <<< Pattern not found!'
 
-    if len(locations) > 0:
-        for loc in locations:
-            cv2.rectangle(haystack.get_gray_array(), (loc.x, loc.y), (loc.x + w, loc.y + h), (0, 0, 255), 2)
-        cv2.imwrite(file_name, haystack.get_gray_array(), [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+    if len(points) > 0:
+        d_array = gray_array.copy()
+        for x, y in points:
+            cv2.rectangle(d_array, (x, y), (x + w, y + h), (0, 0, 255), 2)
     else:
-        gray_img = haystack.get_gray_image()
+        gray_img = Image.fromarray(gray_array)
         search_for_image = needle.get_color_image()
         v_align_pos = int(gray_img.size[1] / 2 - h / 2)
 
@@ -59,9 +157,9 @@ def save_debug_image(needle, haystack, locations):
         d_image.paste(gray_img)
         d_image.paste(search_for_image, (0, v_align_pos))
         d_array = np.array(d_image)
-        cv2.rectangle(d_array, (w, v_align_pos), (haystack.width, v_align_pos + h), (255, 255, 255), cv2.FILLED)
+        cv2.rectangle(d_array, (w, v_align_pos), (gray_img.size[0], v_align_pos + h), (255, 255, 255), cv2.FILLED)
         cv2.putText(d_array, not_found_txt, (w, v_align_pos + h - 5), cv2.FONT_HERSHEY_TRIPLEX, 0.5, (0, 0, 0), 1, 16)
-        cv2.imwrite(file_name, d_array, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+    return d_array
 
 
 def save_debug_ocr_image(text, haystack, text_occurrences):
@@ -72,34 +170,27 @@ def save_debug_ocr_image(text, haystack, text_occurrences):
     :param List[Location] || Location text_occurrences: Location or list of Location as coordinates.
     :return: None.
     """
-    path = PathManager.get_debug_image_directory()
-
-    timestamp_str = re.sub('[ :.-]', '_', str(datetime.datetime.now()))
-    resolution_str = '_not_found' if len(text_occurrences) == 0 else '_found'
-
-    temp_f = timestamp_str + resolution_str
-
-    file_name = '%s.jpg' % os.path.join(path, temp_f)
+    gray_array = haystack.get_gray_array()
+    boxes = [(occurrence.x, occurrence.y, occurrence.width, occurrence.height)
+             for occurrence in text_occurrences or []]
+    _submit_debug_image(lambda: _render_debug_ocr_image(text, gray_array, boxes), len(boxes) > 0)
 
-    if not os.path.exists(path):
-        os.makedirs(path)
 
+def _render_debug_ocr_image(text, gray_array, boxes):
+    """Draws the text boxes, or a not found message, over a copy of the haystack."""
     not_found_txt = ' \'{}\' not found!'.format(text)
 
-    if text_occurrences and len(text_occurrences) > 0:
-        for occurrence in text_occurrences:
-            cv2.rectangle(haystack.get_gray_array(),
-                          (occurrence.x, occurrence.y),
-                          (occurrence.x + occurrence.width, occurrence.y + occurrence.height),
-                          (0, 0, 255), 2)
-        cv2.imwrite(file_name, haystack.get_gray_array(), [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+    if len(boxes) > 0:
+        d_array = gray_array.copy()
+        for x, y, width, height in boxes:
+            cv2.rectangle(d_array, (x, y), (x + width, y + height), (0, 0, 255), 2)
     else:
-        gray_img = haystack.get_gray_image()
+        gray_img = Image.fromarray(gray_array)
         v_align_pos = int(gray_img.size[1] / 2 - 20 / 2)
 
         d_image = Image.new("RGB", (gray_img.size[0], gray_img.size[1]))
         d_image.paste(gray_img)
         d_array = np.array(d_image)
-        cv2.rectangle(d_array, (0, v_align_pos), (haystack.width, v_align_pos + 20), (255, 255, 255), cv2.FILLED)
+        cv2.rectangle(d_array, (0, v_align_pos), (gray_img.size[0], v_align_pos + 20), (255, 255, 255), cv2.FILLED)
         cv2.putText(d_array, not_found_txt, (0, v_align_pos + 20 - 5), cv2.FONT_HERSHEY_TRIPLEX, 0.4, (0, 0, 0), 1, 16)
-        cv2.imwrite(file_name, d_array, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+    return d_array
@@ -0,0 +1,193 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import importlib.util
+import logging
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import mss
+import numpy as np
+import pyautogui
+
+from src.core.api.errors import ScreenshotError
+from src.core.api.os_helpers import OSHelper
+from src.core.api.rectangle import Rectangle
+from src.core.util.arg_parser import get_core_args
+
+logger = logging.getLogger(__name__)
+_backend = None
+
+
+class CaptureBackend(ABC):
+    """Base class for screen capture backends.
+
+    A backend grabs a screen region and returns its pixels together with the OpenCV conversion code that turns them
+    into a gray image.
+    """
+
+    name = None
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """Returns True if the backend can run on this platform."""
+        return True
+
+    @abstractmethod
+    def grab(self, region: Rectangle):
+        """Grabs a region of the screen.
+
+        :param region: Rectangle to capture.
+        :return: Pair of pixel array and cv2 color conversion code to gray.
+        """
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """Captures with pyautogui. On Linux this shells out to scrot or gnome-screenshot."""
+
+    name = 'pyautogui'
+
+    def grab(self, region: Rectangle):
+        grabbed_area = np.array(pyautogui.screenshot(region=(region.x, region.y, region.width, region.height)))
+        return grabbed_area, cv2.COLOR_BGR2GRAY
+
+
+class MssCapture(CaptureBackend):
+    """Captures with mss and exposes the BGRA data as a numpy view, without copying it."""
+
+    name = 'mss'
+
+    def __init__(self):
+        self._mss = mss.mss()
+
+    def grab(self, region: Rectangle):
+        screen_region = {'top': int(region.y), 'left': int(region.x),
+                         'width': int(region.width), 'height': int(region.height)}
+        try:
+            grabbed = self._mss.grab(screen_region)
+        except Exception:
+            raise ScreenshotError('Unable to take screenshot.')
+        return np.frombuffer(grabbed.raw, dtype=np.uint8).reshape(grabbed.height, grabbed.width, 4), \
+            cv2.COLOR_BGRA2GRAY
+
+
+class XlibCapture(CaptureBackend):
+    """Captures through the X display connection used for input, with a single GetImage request per grab.
+
+    Linux only. Expects a 24/32 bit TrueColor visual, as provided by Xvfb and desktop X servers.
+    """
+
+    name = 'xlib'
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return OSHelper.is_linux() and importlib.util.find_spec('Xlib') is not None
+
+    def __init__(self):
+        from Xlib import X
+        from src.core.api.keyboard.Xkeyboard import Xscreen
+
+        self._format = X.ZPixmap
+        self._display = Xscreen().display
+        self._root = self._display.screen().root
+
+    def grab(self, region: Rectangle):
+        try:
+            reply = self._root.get_image(int(region.x), int(region.y), int(region.width), int(region.height),
+                                         self._format, 0xffffffff)
+        except Exception:
+            raise ScreenshotError('Unable to take screenshot.')
+        data = reply.data if isinstance(reply.data, bytes) else reply.data.encode('latin-1')
+        return np.frombuffer(data, dtype=np.uint8).reshape(int(region.height), int(region.width), 4), \
+            cv2.COLOR_BGRA2GRAY
+
+
+class AutoCapture(CaptureBackend):
+    """Default backend: pyautogui on Linux with an mss fallback, mss on other platforms."""
+
+    name = 'auto'
+
+    def __init__(self):
+        self._mss = MssCapture()
+        self._pyautogui = PyAutoGUICapture() if OSHelper.is_linux() else None
+
+    def grab(self, region: Rectangle):
+        if self._pyautogui is not None:
+            try:
+                return self._pyautogui.grab(region)
+            except (IOError, OSError):
+                logger.debug('Call to pyautogui.screnshot failed, using mss instead.')
+        return self._mss.grab(region)
+
+
+CAPTURE_BACKENDS = {
+    AutoCapture.name: AutoCapture,
+    PyAutoGUICapture.name: PyAutoGUICapture,
+    MssCapture.name: MssCapture,
+    XlibCapture.name: XlibCapture
+}
+
+
+def check_capture_backend(name: str) -> bool:
+    """Checks that a capture backend can run on this platform.
+
+    :param name: Name of the backend, as given to the --capture argument.
+    :return: True if the backend is supported.
+    """
+    if not CAPTURE_BACKENDS[name].is_supported():
+        logger.error('The %s screen capture backend is not supported on this platform.' % name)
+        return False
+    return True
+
+
+def get_capture_backend() -> CaptureBackend:
+    """Returns the capture backend selected with the --capture argument.
+
+    Unsupported backends fall back to the auto backend.
+    """
+    global _backend
+    if _backend is None:
+        name = get_core_args().capture
+        if not check_capture_backend(name):
+            name = AutoCapture.name
+        logger.debug('Using %s screen capture backend.' % name)
+        _backend = CAPTURE_BACKENDS[name]()
+    return _backend
+
+
+def benchmark_capture_backends(region: Rectangle, iterations: int = 20) -> dict:
+    """Measures every capture backend available on this machine, including the conversion to gray.
+
+    :param region: Rectangle to capture.
+    :param iterations: Number of grabs per backend.
+    :return: Dictionary of backend name and average seconds per grab.
+    """
+    results = {}
+    for name, backend_class in CAPTURE_BACKENDS.items():
+        if name == AutoCapture.name or not backend_class.is_supported():
+            continue
+        try:
+            backend = backend_class()
+            grabbed_area, conversion = backend.grab(region)
+            cv2.cvtColor(grabbed_area, conversion)
+        except Exception as e:
+            logger.info('Capture backend %s is not available: %s' % (name, e))
+            continue
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            grabbed_area, conversion = backend.grab(region)
+            cv2.cvtColor(grabbed_area, conversion)
+        results[name] = (time.perf_counter() - start) / iterations
+        logger.info('%s: %.2f ms per grab of %sx%s' % (name, results[name] * 1000, region.width, region.height))
+    return results
+
+
+if __name__ == '__main__':
+    from src.core.api.screen.display import DisplayCollection
+
+    logging.basicConfig(level=logging.INFO)
+    benchmark_capture_backends(DisplayCollection[0].bounds)
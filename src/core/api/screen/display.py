@@ -4,41 +4,88 @@
 
 
 import logging
+import threading
 
 import mss
 
 from src.core.api.rectangle import Rectangle
 
-MONITORS = mss.mss().monitors[1:]
 logger = logging.getLogger(__name__)
 
 
 class Display:
-    def __init__(self, screen_id: int = 0):
-        self.bounds = _get_screen_details(screen_id)
-        self.scale = _get_scale(screen_id)
+    def __init__(self, screen_id: int = 0, bounds: Rectangle = None, scale: float = None):
+        if bounds is None or scale is None:
+            bounds = DisplayCollection[screen_id].bounds
+            scale = DisplayCollection[screen_id].scale
+        self.screen_id = screen_id
+        self.bounds = bounds
+        self.scale = scale
 
     def __repr__(self):
         return '%s(%r, %r, %r, %r)' % (self.__class__.__name__, self.bounds.x, self.bounds.y, self.bounds.width,
                                        self.bounds.height)
 
 
-def _get_screen_details(screen_id: int) -> Rectangle:
-    """Get the screen details.
+class _DisplayTopology:
+    """List of the available displays.
 
-    :param screen_id: Screen ID.
-    :return: Region object.
+    Monitors and their scale factors are probed on first use and cached. Call refresh() after the screen
+    configuration changed.
     """
-    if len(MONITORS) == 0:
-        logger.error('Could not retrieve list of available monitors.')
-    else:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._displays = None
+        self._virtual_screen = None
+
+    def __getitem__(self, screen_id):
+        displays = self._get_displays()
         try:
-            details = MONITORS[screen_id]
-            return Rectangle(details['left'], details['top'], details['width'], details['height'])
+            return displays[screen_id]
         except IndexError:
             logger.warning('Screen %s does not exist. Available monitors: %s'
-                           % (screen_id, ', '.join(_get_available_monitors(MONITORS))))
-    return Rectangle()
+                           % (screen_id, ', '.join(_get_available_monitors(displays))))
+            return Display(screen_id, Rectangle(), 1)
+
+    def __iter__(self):
+        return iter(self._get_displays())
+
+    def __len__(self):
+        return len(self._get_displays())
+
+    def get_virtual_screen(self) -> dict:
+        """Returns the mss bounding box of all monitors."""
+        self._get_displays()
+        return self._virtual_screen
+
+    def refresh(self):
+        """Forgets the cached topology. Monitors are probed again on next use."""
+        with self._lock:
+            self._displays = None
+            self._virtual_screen = None
+
+    def _get_displays(self) -> list:
+        displays = self._displays
+        if displays is None:
+            with self._lock:
+                if self._displays is None:
+                    self._probe()
+                displays = self._displays
+        return displays
+
+    def _probe(self):
+        with mss.mss() as sct:
+            monitors = sct.monitors
+            if len(monitors) < 2:
+                logger.error('Could not retrieve list of available monitors.')
+            displays = []
+            for index, details in enumerate(monitors[1:]):
+                bounds = Rectangle(details['left'], details['top'], details['width'], details['height'])
+                displays.append(Display(index, bounds, _get_scale(sct, details)))
+            self._virtual_screen = dict(monitors[0]) if len(monitors) > 0 else {}
+        logger.debug('Display topology: %s' % displays)
+        self._displays = displays
 
 
 def _get_available_monitors(screen_list):
@@ -49,21 +96,17 @@ def _get_available_monitors(screen_list):
     return res
 
 
-def _get_display_collection():
-    res = []
-    for index, item in enumerate(MONITORS):
-        res.append(Display(index))
-    return res
-
-
-def _get_scale(screen_id):
+def _get_scale(sct, monitor: dict) -> float:
+    """Computes the HiDPI scale of a monitor from a one pixel high capture of it."""
+    display_width = monitor['width']
+    if display_width == 0:
+        return 1
+    band = {'left': monitor['left'], 'top': monitor['top'], 'width': display_width, 'height': 1}
     try:
-        display = MONITORS[screen_id]
-        display_width = display['width']
-        screenshot = mss.mss().grab(display)
-        return screenshot.width / display_width
-    except IndexError:
+        return sct.grab(band).width / display_width
+    except Exception:
+        logger.warning('Unable to probe the scale of monitor %s, assuming 1.' % monitor)
         return 1
 
 
-DisplayCollection = _get_display_collection()
+DisplayCollection = _DisplayTopology()
@@ -4,7 +4,7 @@
 
 
 from src.core.api.errors import FindError
-from src.core.api.finder.finder import wait, find, find_all, exists, highlight, wait_vanish
+from src.core.api.finder.finder import wait, find, find_all, exists, highlight, wait_vanish, find_any, wait_any
 from src.core.api.location import Location
 from src.core.api.mouse.mouse import move, press, release, click, right_click, double_click, drag_drop
 from src.core.api.rectangle import Rectangle
@@ -128,15 +128,32 @@ class Region:
         """
         return find_all(ps, self._area)
 
-    def wait(self, ps=None, timeout=None) -> bool or FindError:
+    def find_any(self, patterns=None):
+        """Look for the first match of several Patterns.
+
+        :param patterns: List of Patterns.
+        :return: Call the find_any() method.
+        """
+        return find_any(patterns, self._area)
+
+    def wait(self, ps=None, timeout=None):
         """Wait for a Pattern or image to appear.
 
         :param ps: Pattern or String.
         :param timeout: Number as maximum waiting time in seconds.
-        :return: True or FineError Exception.
+        :return: MatchResult for a Pattern, Location for a String, or FindError Exception.
         """
         return wait(ps, timeout, self._area)
 
+    def wait_any(self, patterns=None, timeout=None):
+        """Wait for the first of several Patterns to appear.
+
+        :param patterns: List of Patterns.
+        :param timeout: Number as maximum waiting time in seconds.
+        :return: Call the wait_any() method.
+        """
+        return wait_any(patterns, timeout, self._area)
+
     def wait_vanish(self, ps=None, timeout=None) -> bool or FindError:
         """Wait for a Pattern or image to disappear.
 
@@ -7,6 +7,7 @@ import logging
 
 from src.core.api.screen.display import DisplayCollection
 from src.core.api.screen.region import Region
+from src.core.api.screen.screenshot_image import snapshot
 from src.core.api.rectangle import Rectangle
 
 import pyautogui
@@ -54,7 +55,15 @@ class Screen(Region):
 
     def get_number_screens(self) -> int:
         """Get the number of screens in a multi-monitor environment at the time the script is running."""
-        return len(self.screen_list)
+        return len(DisplayCollection)
+
+    def snapshot(self):
+        """Context manager sharing one capture of the display among all find operations in the block.
+
+        Regions are cropped out of the shared capture instead of being captured one by one. Use it for several
+        lookups against a screen that does not change in between.
+        """
+        return snapshot()
 
     def get_bounds(self) -> Rectangle:
         """Get the dimensions of monitor represented by the screen object."""
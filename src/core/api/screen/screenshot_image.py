@@ -4,16 +4,17 @@
 
 
 import cv2
-import mss
 import numpy as np
 import logging
-
-from pyautogui import screenshot
+import threading
+import time
+from contextlib import contextmanager
 
 from src.core.api.errors import ScreenshotError
-from src.core.api.os_helpers import OSHelper
+from src.core.api.screen.capture import get_capture_backend
 from src.core.api.screen.display import DisplayCollection
 from src.core.api.rectangle import Rectangle
+from src.core.api.settings import Settings
 
 try:
     import Image
@@ -21,38 +22,50 @@ except ImportError:
     from PIL import Image
 
 logger = logging.getLogger(__name__)
-_mss = mss.mss()
+_buffer_pool = threading.local()
 
 
 class ScreenshotImage:
-    """This class represents the visual representation of a region/screen."""
+    """This class represents the visual representation of a region/screen.
+
+    By default the image is in screen coordinates, downscaled on HiDPI displays. A native image keeps the capture
+    resolution; its scale attribute gives the number of image pixels per screen coordinate.
+    """
 
-    def __init__(self, region: Rectangle = None, screen_id: int = None):
+    def __init__(self, region: Rectangle = None, screen_id: int = None, native: bool = False, shared: bool = True):
         if screen_id is None:
             screen_id = 0
 
         if region is None:
             region = DisplayCollection[screen_id].bounds
 
-        if OSHelper.is_linux():
-            screen_region = region
-        else:
-            screen_region = {'top': int(region.y), 'left': int(region.x),
-                             'width': int(region.width), 'height': int(region.height)}
+        frame = _get_shared_frame(screen_id, native) if shared else None
+        if frame is not None and _crop_frame(self, frame, region, DisplayCollection[screen_id].bounds):
+            return
 
-        self._gray_array = _region_to_image(screen_region)
-        height, width = self._gray_array.shape
-        self.width = width
-        self.height = height
+        self._capture(region, screen_id, native)
 
+    def _capture(self, region: Rectangle, screen_id: int, native: bool):
         scale = DisplayCollection[screen_id].scale
+        self.timestamp = time.time()
+        capture_start = time.perf_counter()
+
+        # On HiDPI displays the full resolution capture is only an intermediate step, so it goes in a pooled buffer.
+        resize = scale != 1 and not native
+        gray_array, self._color_array = _region_to_image(region, pooled=resize)
+        height, width = gray_array.shape
+        self.width = width
+        self.height = height
+        self.scale = scale if native else 1
+        self._gray_array = gray_array
 
-        if scale != 1:
+        if resize:
             self.width = int(width / scale)
             self.height = int(height / scale)
-            self._gray_array = cv2.resize(self._gray_array,
+            self._gray_array = cv2.resize(gray_array,
                                           dsize=(self.width, self.height),
                                           interpolation=cv2.INTER_CUBIC)
+        self.capture_time = time.perf_counter() - capture_start
 
     def get_gray_array(self):
         """Getter for the gray_array property."""
@@ -62,24 +75,150 @@ class ScreenshotImage:
         """Getter for the gray_image property."""
         return Image.fromarray(self._gray_array)
 
+    def get_color_window(self, area: Rectangle):
+        """Returns a BGR copy of an area of the image, from the color pixels of the capture.
+
+        :param area: Rectangle in image coordinates.
+        :return: BGR array with the size of the area.
+        """
+        ratio = self._color_array.shape[1] / self.width
+        window = self._color_array[int(area.y * ratio):int(round((area.y + area.height) * ratio)),
+                                   int(area.x * ratio):int(round((area.x + area.width) * ratio))]
+        window = cv2.cvtColor(window, cv2.COLOR_BGRA2BGR if window.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+        if window.shape[0] != area.height or window.shape[1] != area.width:
+            window = cv2.resize(window, (area.width, area.height), interpolation=cv2.INTER_AREA)
+        return window
+
     def binarize(self):
         return cv2.threshold(self._gray_array, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
 
 
-def _region_to_image(region) -> Image or ScreenshotError:
-    if not OSHelper.is_linux():
-        grabbed_area = _mss_screenshot(region)
-    else:
-        try:
-            grabbed_area = np.array(screenshot(region=(region.x, region.y, region.width, region.height)))
-        except (IOError, OSError):
-            logger.debug('Call to pyautogui.screnshot failed, using mss instead.')
-            grabbed_area = _mss_screenshot(region)
-    return cv2.cvtColor(grabbed_area, cv2.COLOR_BGR2GRAY)
+class _SharedFrames:
+    """Full display captures that Region lookups crop from, instead of taking a new screenshot.
+
+    Frames are shared inside a snapshot() block, and for Settings.frame_reuse_duration seconds after a full display
+    capture.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._frames = {}
+        self.depth = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                return None
+            frame, expiry = entry
+            if self.depth == 0 and time.monotonic() > expiry:
+                del self._frames[key]
+                return None
+            return frame
+
+    def store(self, key: tuple, frame):
+        with self._lock:
+            self._frames[key] = frame, time.monotonic() + Settings.frame_reuse_duration
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def enter(self):
+        with self._lock:
+            if self.depth == 0:
+                self._frames.clear()
+            self.depth += 1
+
+    def leave(self):
+        with self._lock:
+            self.depth -= 1
+            if self.depth == 0:
+                self._frames.clear()
+
+
+_frames = _SharedFrames()
+
+
+def _get_shared_frame(screen_id: int, native: bool):
+    """Returns the shared capture of a display, taking it if a snapshot or frame reuse needs one."""
+    frame = _frames.get((screen_id, native))
+    if frame is None and (_frames.depth > 0 or Settings.frame_reuse_duration > 0):
+        frame = ScreenshotImage.__new__(ScreenshotImage)
+        frame._capture(DisplayCollection[screen_id].bounds, screen_id, native)
+        frame.get_gray_array().flags.writeable = False
+        _frames.store((screen_id, native), frame)
+    return frame
+
+
+def _crop_frame(image: ScreenshotImage, frame: ScreenshotImage, region: Rectangle, bounds: Rectangle) -> bool:
+    """Makes an image a view of a region of a shared display frame. Returns False if the region is not inside it."""
+    x = int((region.x - bounds.x) * frame.scale)
+    y = int((region.y - bounds.y) * frame.scale)
+    width = int(region.width * frame.scale)
+    height = int(region.height * frame.scale)
+    if x < 0 or y < 0 or x + width > frame.width or y + height > frame.height:
+        return False
+    image.width = width
+    image.height = height
+    image.scale = frame.scale
+    image._gray_array = frame.get_gray_array()[y:y + height, x:x + width]
+    ratio = frame._color_array.shape[1] / frame.width
+    image._color_array = frame._color_array[int(y * ratio):int(round((y + height) * ratio)),
+                                            int(x * ratio):int(round((x + width) * ratio))]
+    image.timestamp = frame.timestamp
+    image.capture_time = 0
+    return True
+
+
+@contextmanager
+def snapshot():
+    """Shares one capture per display among all screenshots taken inside the block.
+
+    Region lookups inside the block crop views out of the shared capture, so they all see the same frame. Input events
+    drop the shared capture, so lookups after a click or a key press see a new frame. Polling waits only use the shared
+    capture for their first attempt.
+    """
+    _frames.enter()
+    try:
+        yield
+    finally:
+        _frames.leave()
 
 
-def _mss_screenshot(region):
-    try:
-        return np.array(_mss.grab(region))
-    except Exception:
-        raise ScreenshotError('Unable to take screenshot.')
+def invalidate_shared_frames():
+    """Drops frames kept for reuse, for example after an input event changed the screen.
+
+    Inside a snapshot() block, the next lookup takes a new shared capture.
+    """
+    _frames.clear()
+
+
+def _get_pooled_buffer(height: int, width: int):
+    """Returns a reusable gray buffer of the given size, local to the calling thread."""
+    buffers = getattr(_buffer_pool, 'buffers', None)
+    if buffers is None:
+        buffers = _buffer_pool.buffers = {}
+    buffer = buffers.get((height, width))
+    if buffer is None:
+        buffer = buffers[(height, width)] = np.empty((height, width), dtype=np.uint8)
+    return buffer
+
+
+def _to_gray(grabbed_area, conversion: int, pooled: bool):
+    """Converts a captured area to gray, into a pooled buffer if requested."""
+    if not pooled:
+        return cv2.cvtColor(grabbed_area, conversion)
+    height, width = grabbed_area.shape[:2]
+    return cv2.cvtColor(grabbed_area, conversion, dst=_get_pooled_buffer(height, width))
+
+
+def _region_to_image(region: Rectangle, pooled: bool = False):
+    """Captures a region of the screen, using the selected capture backend.
+
+    :param region: Rectangle to capture.
+    :param pooled: Write the gray array into a reusable buffer. It is only valid until the next pooled capture.
+    :return: Pair of the gray array and the captured color array. The color array is BGRA, or RGB with 3 channels.
+    """
+    grabbed_area, conversion = get_capture_backend().grab(region)
+    return _to_gray(grabbed_area, conversion, pooled), grabbed_area
@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import os
 
 from src.core.api.enums import Color
 from src.core.util.arg_parser import get_core_args
@@ -31,6 +32,25 @@ class _Settings:
     highlight_color             -   The rectangle/circle border color for the highlight effect.
     highlight_thickness         -   The rectangle/circle border thickness for the highlight effect.
     mouse_scroll_step           -   The number of pixels for a vertical/horizontal scroll event.
+    pyramid_levels              -   The maximum number of downscaled levels used for coarse-to-fine template matching.
+                                    0 disables pyramid matching and always searches at full resolution. (default - 0)
+    multi_scale_matching        -   On HiDPI displays, match patterns resized to a few scales around the display scale
+                                    against the full resolution capture, instead of downscaling every capture.
+                                    (default - False)
+    max_matches                 -   The maximum number of matches returned by find_all operations. (default - 100)
+    save_debug_images           -   Whether debug images of find operations are written to the run directory.
+                                    (default - True)
+    debug_images_limit          -   The maximum number of debug images written per test. (default - 50)
+    ocr_cache_limit             -   The maximum memory in MB used to cache OCR results of identical screen regions.
+                                    0 disables the cache. (default - 16)
+    frame_reuse_duration        -   The number of seconds a full display capture is reused by following screenshots of
+                                    regions of that display. Input events end the reuse. 0 disables it. (default - 0)
+    fast_input                  -   Whether the mouse jumps to its target and drags without fixed delays, waiting for
+                                    the pointer to report its new position instead, and key combinations are sent
+                                    without delays between keys. Animated moves are kept for demos.
+                                    (default - True if the CI environment variable is set, otherwise False)
+    type_paste_length           -   The minimum length of a single line text that type() pastes from the clipboard
+                                    instead of typing it. 0 disables pasting. (default - 0)
     """
 
     DEFAULT_MIN_SIMILARITY = 0.8
@@ -49,6 +69,15 @@ class _Settings:
     DEFAULT_HIGHLIGHT_COLOR = Color.RED
     DEFAULT_HIGHLIGHT_THICKNESS = 2
     DEFAULT_MOUSE_SCROLL_STEP = 100
+    DEFAULT_PYRAMID_LEVELS = 0
+    DEFAULT_MULTI_SCALE_MATCHING = False
+    DEFAULT_MAX_MATCHES = 100
+    DEFAULT_SAVE_DEBUG_IMAGES = True
+    DEFAULT_DEBUG_IMAGES_LIMIT = 50
+    DEFAULT_OCR_CACHE_LIMIT = 16
+    DEFAULT_FRAME_REUSE_DURATION = 0
+    DEFAULT_FAST_INPUT = 'CI' in os.environ
+    DEFAULT_TYPE_PASTE_LENGTH = 0
     DEFAULT_SITE_LOAD_TIMEOUT = 30
     DEFAULT_HEAVY_SITE_LOAD_TIMEOUT = 90
     UI_DELAY = 1
@@ -66,7 +95,16 @@ class _Settings:
                  highlight_duration=DEFAULT_HIGHLIGHT_DURATION,
                  highlight_color=DEFAULT_HIGHLIGHT_COLOR,
                  highlight_thickness=DEFAULT_HIGHLIGHT_THICKNESS,
-                 mouse_scroll_step=DEFAULT_MOUSE_SCROLL_STEP):
+                 mouse_scroll_step=DEFAULT_MOUSE_SCROLL_STEP,
+                 pyramid_levels=DEFAULT_PYRAMID_LEVELS,
+                 multi_scale_matching=DEFAULT_MULTI_SCALE_MATCHING,
+                 max_matches=DEFAULT_MAX_MATCHES,
+                 save_debug_images=DEFAULT_SAVE_DEBUG_IMAGES,
+                 debug_images_limit=DEFAULT_DEBUG_IMAGES_LIMIT,
+                 ocr_cache_limit=DEFAULT_OCR_CACHE_LIMIT,
+                 frame_reuse_duration=DEFAULT_FRAME_REUSE_DURATION,
+                 fast_input=DEFAULT_FAST_INPUT,
+                 type_paste_length=DEFAULT_TYPE_PASTE_LENGTH):
 
         self.wait_scan_rate = wait_scan_rate
         self._type_delay = type_delay
@@ -84,6 +122,15 @@ class _Settings:
         self.highlight_color = highlight_color.value
         self.highlight_thickness = highlight_thickness
         self.mouse_scroll_step = mouse_scroll_step
+        self.pyramid_levels = pyramid_levels
+        self.multi_scale_matching = multi_scale_matching
+        self.max_matches = max_matches
+        self.save_debug_images = save_debug_images
+        self.debug_images_limit = debug_images_limit
+        self.ocr_cache_limit = ocr_cache_limit
+        self.frame_reuse_duration = frame_reuse_duration
+        self.fast_input = fast_input
+        self.type_paste_length = type_paste_length
 
     @property
     def type_delay(self):
@@ -0,0 +1,9 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import sys
+
+# Iris modules parse the command line when they are imported. Keep the pytest arguments away from them.
+sys.argv = sys.argv[:1]
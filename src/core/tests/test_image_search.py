@@ -0,0 +1,119 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import cv2
+import numpy as np
+
+from src.core.api.finder.image_search import _is_color_match, _match_template
+from src.core.api.screen.screenshot_image import ScreenshotImage
+
+ICON_SIZE = 20
+BLUE = (200, 60, 20)
+
+
+class _ColorPattern:
+    """Stands in for a Pattern, with only the arrays used by the color check."""
+
+    def __init__(self, color_array, mask_array=None):
+        self._color_array = color_array
+        self._mask_array = mask_array
+
+    def get_color_array(self):
+        return self._color_array
+
+    def get_mask_array(self):
+        return self._mask_array
+
+
+def _get_icon(color) -> np.ndarray:
+    icon = np.full((ICON_SIZE, ICON_SIZE, 3), 255, np.uint8)
+    cv2.circle(icon, (ICON_SIZE // 2, ICON_SIZE // 2), ICON_SIZE // 2 - 2, color, -1)
+    return icon
+
+
+def _get_screen(icon, x: int, y: int) -> ScreenshotImage:
+    color_array = np.full((60, 80, 4), 255, np.uint8)
+    color_array[y:y + ICON_SIZE, x:x + ICON_SIZE, :3] = icon
+    image = ScreenshotImage.__new__(ScreenshotImage)
+    image._color_array = color_array
+    image._gray_array = cv2.cvtColor(color_array, cv2.COLOR_BGRA2GRAY)
+    image.height, image.width = image._gray_array.shape
+    image.scale = 1
+    return image
+
+
+def _get_gray_of_same_luminance(color) -> tuple:
+    luminance = int(cv2.cvtColor(np.uint8([[color]]), cv2.COLOR_BGR2GRAY)[0, 0])
+    return luminance, luminance, luminance
+
+
+def test_color_match_accepts_same_colors():
+    icon = _get_icon(BLUE)
+    assert _is_color_match(_ColorPattern(icon), _get_screen(icon, 30, 20), 31, 19, (ICON_SIZE, ICON_SIZE))
+
+
+def test_color_match_rejects_other_hue_of_same_luminance():
+    blue_icon = _get_icon(BLUE)
+    gray_icon = _get_icon(_get_gray_of_same_luminance(BLUE))
+    assert np.array_equal(cv2.cvtColor(blue_icon, cv2.COLOR_BGR2GRAY), cv2.cvtColor(gray_icon, cv2.COLOR_BGR2GRAY))
+
+    screen = _get_screen(gray_icon, 30, 20)
+    assert not _is_color_match(_ColorPattern(blue_icon), screen, 30, 20, (ICON_SIZE, ICON_SIZE))
+
+
+def test_color_match_only_compares_opaque_pixels():
+    icon = _get_icon(BLUE)
+    mask = np.zeros((ICON_SIZE, ICON_SIZE), np.uint8)
+    cv2.circle(mask, (ICON_SIZE // 2, ICON_SIZE // 2), ICON_SIZE // 2 - 2, 255, -1)
+    screen_icon = icon.copy()
+    screen_icon[mask == 0] = (40, 160, 40)
+
+    screen = _get_screen(screen_icon, 30, 20)
+    assert _is_color_match(_ColorPattern(icon, mask), screen, 30, 20, (ICON_SIZE, ICON_SIZE))
+
+
+def _get_masked_needle():
+    """Returns a dark circle on a light field, with transparent corners."""
+    needle = np.full((24, 24), 200, np.uint8)
+    cv2.circle(needle, (12, 12), 7, 40, -1)
+    mask = np.zeros((24, 24), np.uint8)
+    cv2.circle(mask, (12, 12), 11, 255, -1)
+    return needle, mask
+
+
+def test_masked_match_finds_needle_on_other_background():
+    needle, mask = _get_masked_needle()
+    haystack = np.full((100, 120), 90, np.uint8)
+    window = haystack[30:54, 50:74]
+    window[mask > 0] = needle[mask > 0]
+
+    res = _match_template(haystack, needle, mask)
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    assert max_val > 0.99
+    assert max_loc == (50, 30)
+
+
+def test_masked_match_rejects_flat_and_wrong_shapes():
+    needle, mask = _get_masked_needle()
+    haystack = np.full((100, 120), 210, np.uint8)
+    assert _match_template(haystack, needle, mask).max() < 0.5
+
+    cv2.rectangle(haystack, (40, 40), (60, 60), 40, -1)
+    assert _match_template(haystack, needle, mask).max() < 0.8
+
+
+def test_masked_match_of_single_color_needle_uses_its_shape():
+    needle = np.full((24, 24), 30, np.uint8)
+    mask = np.zeros((24, 24), np.uint8)
+    cv2.rectangle(mask, (4, 10), (19, 13), 255, -1)
+    cv2.rectangle(mask, (10, 4), (13, 19), 255, -1)
+    haystack = np.full((100, 120), 240, np.uint8)
+    haystack[20:44, 30:54][mask > 0] = 30
+
+    res = _match_template(haystack, needle, mask)
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    assert max_val > 0.99
+    assert max_loc == (30, 20)
+    assert _match_template(np.full((100, 120), 240, np.uint8), needle, mask).max() < 0.5
@@ -0,0 +1,92 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import shutil
+import time
+
+import pytest
+
+pytest.importorskip('Xlib.display')
+
+from Xlib import X
+from Xlib.display import Display
+
+from src.core.api.input_session import InputSession
+from src.core.util.parallel_runner import _start_xvfb
+
+EVENT_TIMEOUT = 5
+
+pytestmark = pytest.mark.skipif(shutil.which('Xvfb') is None, reason='Xvfb is not installed.')
+
+
+@pytest.fixture(scope='module')
+def display_name():
+    process, display = _start_xvfb()
+    yield ':%s' % display
+    process.terminate()
+    process.wait()
+
+
+@pytest.fixture
+def session(display_name):
+    session = InputSession(display_name)
+    yield session
+    session.close()
+
+
+def _next_event(display: Display):
+    deadline = time.monotonic() + EVENT_TIMEOUT
+    while display.pending_events() == 0:
+        assert time.monotonic() < deadline, 'No event received.'
+        time.sleep(0.01)
+    return display.next_event()
+
+
+def _create_focused_window(display: Display):
+    screen = display.screen()
+    window = screen.root.create_window(0, 0, 200, 100, 0, screen.root_depth,
+                                       event_mask=X.KeyPressMask | X.StructureNotifyMask)
+    window.map()
+    while _next_event(display).type != X.MapNotify:
+        pass
+    window.set_input_focus(X.RevertToParent, X.CurrentTime)
+    display.sync()
+    return window
+
+
+def test_xkeyboard_typewrite_sends_text(display_name, session):
+    display = Display(display_name)
+    try:
+        _create_focused_window(display)
+        text = 'Hi, Iris!'
+        session.get_keyboard().typewrite(text)
+
+        typed = ''
+        while len(typed) < len(text):
+            event = _next_event(display)
+            if event.type == X.KeyPress:
+                keysym = display.keycode_to_keysym(event.detail, 1 if event.state & X.ShiftMask else 0)
+                # Modifier keys have keysyms outside of Latin-1.
+                if keysym < 0x100:
+                    typed += chr(keysym)
+        assert typed == text
+    finally:
+        display.close()
+
+
+def test_xkeyboard_maps_key_names(session):
+    keyboard = session.get_keyboard()
+    assert keyboard.isValidKey('enter')
+    assert keyboard.isValidKey('a')
+    assert keyboard.isShiftCharacter('A')
+    assert not keyboard.isShiftCharacter('a')
+
+
+def test_xmouse_controller_position(session):
+    mouse = session.get_mouse()
+    mouse.position = (123, 45)
+    assert tuple(mouse.position) == (123, 45)
+    mouse.position = (0, 0)
+    assert tuple(mouse.position) == (0, 0)
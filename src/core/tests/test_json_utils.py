@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import json
+import os
+
+from src.core.util.json_utils import _merge_test_lists, merge_run_logs
+
+
+def _get_run_log(log: str, start_time: float, end_time: float, counts: dict, all_tests: list,
+                 failed_tests: list = None) -> dict:
+    meta = {'log': log, 'start_time': start_time, 'end_time': end_time, 'total_time': end_time - start_time}
+    meta.update(counts)
+    return {'meta': meta, 'tests': {'all_tests': all_tests, 'failed_tests': failed_tests or []}}
+
+
+def _write_run_log(directory, name: str, run_log: dict) -> str:
+    path = os.path.join(str(directory), name)
+    with open(path, 'w') as f:
+        json.dump(run_log, f)
+    return path
+
+
+def test_merge_test_lists_merges_directories_by_name():
+    tests = [{'name': 'nav', 'children': [{'name': 'back', 'result': 'PASSED'}]},
+             {'name': 'top', 'result': 'PASSED'}]
+    other_tests = [{'name': 'nav', 'children': [{'name': 'forward', 'result': 'FAILED'},
+                                                {'name': 'deep', 'children': [{'name': 'x', 'result': 'PASSED'}]}]},
+                   {'name': 'menus', 'children': [{'name': 'open', 'result': 'PASSED'}]}]
+
+    _merge_test_lists(tests, other_tests)
+
+    assert [test['name'] for test in tests] == ['nav', 'top', 'menus']
+    assert [test['name'] for test in tests[0]['children']] == ['back', 'forward', 'deep']
+    assert tests[0]['children'][2]['children'] == [{'name': 'x', 'result': 'PASSED'}]
+
+
+def test_merge_test_lists_does_not_merge_a_test_into_a_directory():
+    tests = [{'name': 'nav', 'children': []}]
+    _merge_test_lists(tests, [{'name': 'nav', 'result': 'PASSED'}])
+    assert tests == [{'name': 'nav', 'children': []}, {'name': 'nav', 'result': 'PASSED'}]
+
+
+def test_merge_run_logs_adds_counters_and_spans_run(tmpdir):
+    first = _get_run_log('worker_0.log', 100, 150, {'total': 3, 'passed': 2, 'failed': 1, 'skipped': 0, 'errors': 0},
+                         [{'name': 'a', 'result': 'PASSED'}], [{'name': 'b', 'result': 'FAILED'}])
+    second = _get_run_log('worker_1.log', 90, 140, {'total': 2, 'passed': 0, 'failed': 0, 'skipped': 1, 'errors': 1},
+                          [{'name': 'c', 'result': 'SKIPPED'}], [{'name': 'd', 'result': 'ERROR'}])
+    run_files = [_write_run_log(tmpdir, 'first.json', first), _write_run_log(tmpdir, 'second.json', second)]
+
+    merged = merge_run_logs(run_files)
+
+    meta = merged['meta']
+    assert (meta['total'], meta['passed'], meta['failed'], meta['skipped'], meta['errors']) == (5, 2, 1, 1, 1)
+    assert (meta['start_time'], meta['end_time'], meta['total_time']) == (90, 150, 60)
+    assert meta['logs'] == ['worker_0.log', 'worker_1.log']
+    assert [test['name'] for test in merged['tests']['all_tests']] == ['a', 'c']
+    assert [test['name'] for test in merged['tests']['failed_tests']] == ['b', 'd']
+
+
+def test_merge_run_logs_skips_unreadable_files(tmpdir):
+    run_log = _get_run_log('worker_1.log', 0, 1, {'total': 1, 'passed': 1, 'failed': 0, 'skipped': 0, 'errors': 0},
+                           [])
+    broken_file = os.path.join(str(tmpdir), 'broken.json')
+    with open(broken_file, 'w') as f:
+        f.write('{')
+
+    merged = merge_run_logs([os.path.join(str(tmpdir), 'missing.json'), broken_file,
+                             _write_run_log(tmpdir, 'run.json', run_log)])
+
+    assert merged['meta']['total'] == 1
+    assert merged['meta']['logs'] == ['worker_1.log']
+    assert merge_run_logs([broken_file]) is None
@@ -0,0 +1,37 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import logging
+
+from src.core.api.finder import ocr
+
+TSV = 'level\tpage_num\ttext\n5\t1\tIris\n'
+
+
+class _FailingTesserocr:
+    """Stands in for a tesserocr build without usable tessdata."""
+
+    calls = 0
+
+    @classmethod
+    def PyTessBaseAPI(cls):
+        cls.calls += 1
+        raise RuntimeError('Failed to init API, possibly an invalid tessdata path')
+
+
+def test_image_to_rows_falls_back_to_tesseract_command(monkeypatch, caplog):
+    pool = ocr._TesseractAPIPool()
+    monkeypatch.setattr(ocr, 'tesserocr', _FailingTesserocr)
+    monkeypatch.setattr(ocr, '_api_pool', pool)
+    monkeypatch.setattr(ocr.pytesseract, 'image_to_data', lambda image: TSV)
+
+    with caplog.at_level(logging.WARNING, logger=ocr.__name__):
+        assert ocr.image_to_rows(None) == [['5', '1', 'Iris']]
+        assert ocr.image_to_rows(None) == [['5', '1', 'Iris']]
+
+    assert ocr._api_pool is None
+    assert pool._created == 0
+    assert _FailingTesserocr.calls == 1
+    assert len([record for record in caplog.records if 'libtesseract' in record.message]) == 1
@@ -0,0 +1,57 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import os
+
+from src.core.util import parallel_runner
+from src.core.util.parallel_runner import _get_worker_argv, get_test_modules
+from src.core.util.path_manager import PathManager
+
+
+def test_worker_argv_drops_positionals_and_runner_options():
+    argv = ['firefox', 'nav', '-t', '4', '-c', '--control', '-z', '--capture', 'mss']
+    assert _get_worker_argv(argv) == ['-t', '4', '-z', '--capture', 'mss']
+
+
+def test_worker_argv_keeps_option_values_equal_to_positionals():
+    argv = ['firefox', 'en-US', '-l', 'en-US', '-x', 'firefox', '--port=2000']
+    assert _get_worker_argv(argv) == ['-l', 'en-US', '-x', 'firefox', '--port=2000']
+
+
+def _create_test_tree(root: str, modules: list):
+    for module in modules:
+        path = os.path.join(root, module)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('')
+
+
+def test_test_modules_are_filtered_and_sorted(tmpdir, monkeypatch):
+    tests_dir = str(tmpdir)
+    app_dir = os.path.join(tests_dir, 'app')
+    _create_test_tree(app_dir, ['nav/test_b.py', 'nav/test_a.py', 'nav/__init__.py', 'nav/images/test_c.py',
+                                'menus/test_d.py', 'menus/helper.txt', 'menus_extra/test_e.py',
+                                'skipped/test_f.py', 'single/test_g.py'])
+    running = [os.path.join(app_dir, 'nav'), os.path.join(app_dir, 'menus'), os.path.join(app_dir, 'menus_extra'),
+               os.path.join(app_dir, 'skipped'), os.path.join(app_dir, 'single', 'test_g.py'),
+               os.path.join(app_dir, 'missing')]
+    excluded = [os.path.join(app_dir, 'skipped'), os.path.join(app_dir, 'menus_extra', 'test_e.py')]
+    monkeypatch.setattr(parallel_runner, 'get_app_test_directory',
+                        lambda app: {'running': running, 'excluded': excluded})
+    monkeypatch.setattr(PathManager, 'get_tests_dir', staticmethod(lambda: tests_dir))
+
+    assert get_test_modules('app') == [os.path.join('menus', 'test_d.py'), os.path.join('nav', 'test_a.py'),
+                                       os.path.join('nav', 'test_b.py'), os.path.join('single', 'test_g.py')]
+
+
+def test_excluded_directory_does_not_exclude_its_prefix(tmpdir, monkeypatch):
+    tests_dir = str(tmpdir)
+    app_dir = os.path.join(tests_dir, 'app')
+    _create_test_tree(app_dir, ['menus/test_d.py', 'menus_extra/test_e.py'])
+    monkeypatch.setattr(parallel_runner, 'get_app_test_directory',
+                        lambda app: {'running': [app_dir], 'excluded': [os.path.join(app_dir, 'menus')]})
+    monkeypatch.setattr(PathManager, 'get_tests_dir', staticmethod(lambda: tests_dir))
+
+    assert get_test_modules('app') == [os.path.join('menus_extra', 'test_e.py')]
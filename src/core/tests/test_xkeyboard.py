@@ -0,0 +1,47 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import pytest
+
+pytest.importorskip('Xlib.XK')
+
+import Xlib.XK
+
+from src.core.api.keyboard.Xkeyboard import _get_keysym
+from src.core.api.keyboard.key import Key
+
+# Key names that pyautogui maps to X keysyms, with the keysym it uses.
+PYAUTOGUI_KEY_NAMES = {
+    'backspace': 'BackSpace', '\b': 'BackSpace', 'tab': 'Tab', 'enter': 'Return', 'return': 'Return',
+    'shift': 'Shift_L', 'ctrl': 'Control_L', 'alt': 'Alt_L', 'pause': 'Pause', 'capslock': 'Caps_Lock',
+    'esc': 'Escape', 'escape': 'Escape', 'pgup': 'Page_Up', 'pgdn': 'Page_Down', 'pageup': 'Page_Up',
+    'pagedown': 'Page_Down', 'end': 'End', 'home': 'Home', 'left': 'Left', 'up': 'Up', 'right': 'Right',
+    'down': 'Down', 'select': 'Select', 'print': 'Print', 'execute': 'Execute', 'prtsc': 'Print', 'prtscr': 'Print',
+    'prntscrn': 'Print', 'printscreen': 'Print', 'insert': 'Insert', 'del': 'Delete', 'delete': 'Delete',
+    'help': 'Help', 'win': 'Super_L', 'winleft': 'Super_L', 'winright': 'Super_R', 'multiply': 'KP_Multiply',
+    'add': 'KP_Add', 'separator': 'KP_Separator', 'subtract': 'KP_Subtract', 'decimal': 'KP_Decimal',
+    'divide': 'KP_Divide', 'numlock': 'Num_Lock', 'scrolllock': 'Scroll_Lock', 'shiftleft': 'Shift_L',
+    'shiftright': 'Shift_R', 'ctrlleft': 'Control_L', 'ctrlright': 'Control_R', 'altleft': 'Alt_L',
+    'altright': 'Alt_R', ' ': 'space', 'space': 'space', '\t': 'Tab', '\n': 'Return', '\r': 'Return',
+    '\\e': 'Escape'
+}
+PYAUTOGUI_KEY_NAMES.update({'num%s' % digit: 'KP_%s' % digit for digit in range(10)})
+PYAUTOGUI_KEY_NAMES.update({'f%s' % number: 'F%s' % number for number in range(1, 25)})
+
+
+@pytest.mark.parametrize('name', sorted(PYAUTOGUI_KEY_NAMES))
+def test_pyautogui_key_names_resolve_to_their_keysym(name):
+    assert _get_keysym(name) == Xlib.XK.string_to_keysym(PYAUTOGUI_KEY_NAMES[name])
+
+
+def test_key_labels_resolve():
+    for key in Key:
+        if key.value.x11key is not None:
+            assert _get_keysym(key.value.label) != 0, key
+
+
+@pytest.mark.parametrize('character', ['a', 'Z', '7', '!', '~', ' ', 'é'])
+def test_characters_resolve_to_latin1_keysyms(character):
+    assert _get_keysym(character) == ord(character)
@@ -10,9 +10,11 @@ import os
 logger = logging.getLogger(__name__)
 iris_args = None
 
+PATTERNS_COMMAND = 'patterns'
 
-def get_core_args():
-    global iris_args
+
+def get_core_parser() -> argparse.ArgumentParser:
+    """Returns the parser of the Iris command line arguments."""
     home = os.path.expanduser('~')
 
     log_level_strings = ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG']
@@ -32,7 +34,9 @@ def get_core_args():
     for idx, app in enumerate(app_list):
         app_list[idx] = os.path.basename(os.path.normpath(app))
 
-    parser.add_argument('application', nargs='?', action='store', type=str, help='Application name', choices=app_list)
+    parser.add_argument('application', nargs='?', action='store', type=str,
+                        help='Application name, or "patterns" followed by "build" to preprocess pattern images',
+                        choices=app_list + [PATTERNS_COMMAND])
     parser.add_argument('test_path', action='store', type=str, help='Path to tests module or directory', nargs='?')
 
     parser.add_argument('-a', '--rerun',
@@ -45,6 +49,9 @@ def get_core_args():
                         help='Clear run data',
                         default=False,
                         action='store_true')
+    parser.add_argument('-d', '--location_hints',
+                        help='Search first where each pattern was found in previous runs',
+                        action='store_true')
     parser.add_argument('-e', '--email',
                         help='Submit email report',
                         action='store_true')
@@ -56,6 +63,9 @@ def get_core_args():
                         type=log_level_string_to_int,
                         dest='level',
                         default='INFO')
+    parser.add_argument('-j', '--pattern_cache',
+                        help='Cache decoded pattern images on disk between runs',
+                        action='store_true')
     parser.add_argument('-k', '--control',
                         help='Display control center',
                         action='store_true')
@@ -82,6 +92,16 @@ def get_core_args():
     parser.add_argument('-r', '--report',
                         help='Report tests to TestRail',
                         action='store_true')
+    parser.add_argument('-t', '--workers',
+                        help='Number of parallel test workers, each on its own Xvfb display (Linux only)',
+                        type=int,
+                        action='store',
+                        default=1)
+    parser.add_argument('--capture',
+                        help='Screen capture backend',
+                        choices=['auto', 'pyautogui', 'mss', 'xlib'],
+                        action='store',
+                        default='auto')
     parser.add_argument('-w', '--workdir',
                         help='Path to working directory',
                         type=os.path.abspath,
@@ -93,7 +113,12 @@ def get_core_args():
     parser.add_argument('-z', '--resize',
                         help='Convert hi-res images to normal',
                         action='store_true')
+    return parser
+
+
+def get_core_args():
+    global iris_args
     if iris_args is None:
-        iris_args = parser.parse_known_args()[0]
+        iris_args = get_core_parser().parse_known_args()[0]
 
     return iris_args
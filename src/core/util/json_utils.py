@@ -44,6 +44,10 @@ def create_target_json():
 
 
 def update_run_index(app, finished=False):
+    if PathManager.get_worker_id() is not None:
+        # Workers of a parallel run share the run id, the runner indexes their merged results.
+        return
+
     if finished:
         failed = 0
         total_duration = 0
@@ -65,7 +69,11 @@ def update_run_index(app, finished=False):
                        'locale': args.locale,
                        'target': args.application,
                        'total': '-1'}
+    write_run_index(current_run)
+
 
+def write_run_index(current_run: dict):
+    """Adds a run to runs.json in the working directory, replacing any previous entry with the same id."""
     run_file = os.path.join(args.workdir, 'data', 'runs.json')
 
     if os.path.exists(run_file):
@@ -133,13 +141,66 @@ def create_run_log(app):
     tests = {'all_tests': convert_test_list(app.completed_tests),
              'failed_tests': convert_test_list(app.completed_tests, only_failures=True)}
 
-    run_file = os.path.join(PathManager.get_current_run_dir(), 'run.json')
-    run_file_data = {'meta': meta, 'tests': tests}
+    write_run_log({'meta': meta, 'tests': tests})
 
+
+def write_run_log(run_file_data: dict):
+    """Writes run.json in the directory of the current run."""
+    run_file = os.path.join(PathManager.get_current_run_dir(), 'run.json')
     with open(run_file, 'w') as f:
         json.dump(run_file_data, f, sort_keys=True, indent=True)
 
 
+def merge_run_logs(run_files: list) -> dict or None:
+    """Merges the run.json files written by the workers of a parallel run.
+
+    Counters are added up, the run spans from the first start to the last end, and the test trees are merged by
+    directory name.
+
+    :param run_files: Paths of the run.json files.
+    :return: Merged run.json data, or None if no file could be read.
+    """
+    merged = None
+    for run_file in run_files:
+        try:
+            with open(run_file, 'r') as f:
+                run_file_data = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning('Unable to read run file %s: %s' % (run_file, e))
+            continue
+
+        if merged is None:
+            merged = run_file_data
+            merged['meta']['logs'] = [merged['meta']['log']]
+            continue
+
+        meta = merged['meta']
+        other_meta = run_file_data['meta']
+        for key in ('total', 'passed', 'failed', 'skipped', 'errors'):
+            meta[key] += other_meta[key]
+        meta['start_time'] = min(meta['start_time'], other_meta['start_time'])
+        meta['end_time'] = max(meta['end_time'], other_meta['end_time'])
+        meta['total_time'] = meta['end_time'] - meta['start_time']
+        meta['logs'].append(other_meta['log'])
+        for key in ('all_tests', 'failed_tests'):
+            _merge_test_lists(merged['tests'][key], run_file_data['tests'][key])
+    return merged
+
+
+def _merge_test_lists(tests: list, other_tests: list):
+    """Adds the tests of a converted test list to another one, merging directories with the same name."""
+    for test_obj in other_tests:
+        if 'children' in test_obj:
+            for objects in tests:
+                if objects['name'] == test_obj['name'] and 'children' in objects:
+                    _merge_test_lists(objects['children'], test_obj['children'])
+                    break
+            else:
+                tests.append(test_obj)
+        else:
+            tests.append(test_obj)
+
+
 def convert_test_list(test_list, only_failures=False):
     """Takes a flat list of test objects and paths and converts to an object that can be serialized as JSON.
 
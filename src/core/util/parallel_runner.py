@@ -0,0 +1,209 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from src.core.api.os_helpers import OSHelper
+from src.core.util.app_loader import get_app_test_directory
+from src.core.util.arg_parser import get_core_args, get_core_parser
+from src.core.util.json_utils import merge_run_logs, write_run_index, write_run_log
+from src.core.util.path_manager import PathManager, RUN_ID_VARIABLE, WORKER_ID_VARIABLE
+
+logger = logging.getLogger(__name__)
+
+XVFB_SCREEN = '1920x1080x24'
+PROCESS_STOP_TIMEOUT = 10
+EXCLUDED_DIRECTORIES = {'images', '.pytest_cache', '__pycache__'}
+WORKER_COMMAND = 'from src.__main__ import main; main()'
+COORDINATOR_ONLY_ARGUMENTS = {'-c', '--clear', '-k', '--control'}
+
+
+class _Worker:
+    """One process of a parallel run, with its own Xvfb display, web server port and run subdirectory."""
+
+    def __init__(self, worker_id: int, tests: list, port: int):
+        self.worker_id = worker_id
+        self.tests = tests
+        self.port = port
+        self.display = None
+        self.xvfb = None
+        self.process = None
+        self.run_directory = os.path.join(PathManager.get_current_run_dir(),
+                                          PathManager.get_worker_directory_name(worker_id))
+
+    def start(self, argv: list):
+        """Starts the Xvfb server of the worker, then the worker itself."""
+        self.xvfb, self.display = _start_xvfb()
+        os.makedirs(self.run_directory, exist_ok=True)
+
+        env = dict(os.environ)
+        env['DISPLAY'] = ':%s' % self.display
+        env[RUN_ID_VARIABLE] = PathManager.get_run_id()
+        env[WORKER_ID_VARIABLE] = str(self.worker_id)
+
+        args = [sys.executable, '-c', WORKER_COMMAND, get_core_args().application, ','.join(self.tests)] + argv + \
+            ['--port', str(self.port), '--workers', '1']
+        logger.info('Starting worker %s on display :%s with %s test modules.'
+                    % (self.worker_id, self.display, len(self.tests)))
+        with open(os.path.join(self.run_directory, 'console.log'), 'w') as console:
+            self.process = subprocess.Popen(args, env=env, cwd=PathManager.get_module_dir(), stdout=console,
+                                            stderr=subprocess.STDOUT)
+
+    def wait(self) -> int:
+        """Waits for the worker to finish and returns its exit status."""
+        return self.process.wait()
+
+    def stop(self):
+        """Stops the worker, if it is still running, and its Xvfb server."""
+        for process in (self.process, self.xvfb):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(PROCESS_STOP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def _start_xvfb():
+    """Starts an Xvfb server on the first free display number.
+
+    :return: Pair of the Xvfb process and its display number.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        process = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', XVFB_SCREEN,
+                                    '-nolisten', 'tcp'], pass_fds=(write_fd,), stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+    finally:
+        os.close(write_fd)
+
+    # Xvfb writes the display number to the pipe once it accepts connections.
+    with os.fdopen(read_fd) as display_pipe:
+        display = display_pipe.readline().strip()
+    if not display:
+        process.kill()
+        raise OSError('Xvfb did not start.')
+    return process, int(display)
+
+
+def get_test_modules(app: str) -> list:
+    """Lists the test modules selected by the test_path and exclude arguments.
+
+    :param app: Application name.
+    :return: Sorted list of module paths, relative to the test directory of the application.
+    """
+    tests_to_execute = get_app_test_directory(app)
+    excluded = [os.path.normpath(path) for path in tests_to_execute['excluded']]
+    app_test_directory = os.path.join(PathManager.get_tests_dir(), app)
+
+    def is_excluded(path):
+        return any(path == exclusion or path.startswith(exclusion + os.sep) for exclusion in excluded)
+
+    modules = []
+    for running in tests_to_execute['running']:
+        running = os.path.normpath(running)
+        if os.path.isfile(running):
+            if not is_excluded(running):
+                modules.append(running)
+            continue
+        if not os.path.isdir(running):
+            logger.warning('Test path not found: %s' % running)
+            continue
+        for path, dirs, files in PathManager.sorted_walk(running):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRECTORIES and not is_excluded(os.path.join(path, d))]
+            for file_name in files:
+                module = os.path.join(path, file_name)
+                if file_name.endswith('.py') and file_name != '__init__.py' and not is_excluded(module):
+                    modules.append(module)
+    return sorted(os.path.relpath(module, app_test_directory) for module in set(modules))
+
+
+def _get_worker_argv(argv: list) -> list:
+    """Returns the command line arguments passed on to workers.
+
+    The positional arguments are replaced by each worker, and arguments acting on the whole run stay with the runner.
+    Option values are kept with their option, even when they are equal to a positional argument.
+    """
+    value_options = {option for action in get_core_parser()._actions if action.nargs != 0
+                     for option in action.option_strings}
+    worker_argv = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        index += 1
+        if not arg.startswith('-'):
+            continue
+        option = [arg]
+        if arg in value_options and index < len(argv):
+            option.append(argv[index])
+            index += 1
+        if arg not in COORDINATOR_ONLY_ARGUMENTS:
+            worker_argv.extend(option)
+    return worker_argv
+
+
+def run_parallel(workers: int) -> int:
+    """Runs the selected tests of the application in parallel worker processes.
+
+    Each worker gets its own Xvfb display, local web server port and run subdirectory, where it keeps its profiles,
+    logs and run.json. Test modules are dealt to workers in turn. Once all workers finished, their run.json files
+    are merged into the run directory and the run is added to runs.json.
+
+    :param workers: Maximum number of workers.
+    :return: Exit status, 0 if all workers succeeded.
+    """
+    if not OSHelper.is_linux() or shutil.which('Xvfb') is None:
+        logger.error('Parallel runs need Xvfb, which is only available on Linux.')
+        return 1
+
+    args = get_core_args()
+    modules = get_test_modules(args.application)
+    if len(modules) == 0:
+        logger.error('No tests found.')
+        return 1
+
+    workers = min(workers, len(modules))
+    worker_list = [_Worker(worker_id, modules[worker_id::workers], args.port + worker_id)
+                   for worker_id in range(workers)]
+    worker_argv = _get_worker_argv(sys.argv[1:])
+
+    start_time = time.time()
+    exit_status = 0
+    try:
+        for worker in worker_list:
+            worker.start(worker_argv)
+        for worker in worker_list:
+            status = worker.wait()
+            logger.info('Worker %s finished with exit status %s.' % (worker.worker_id, status))
+            if status != 0:
+                exit_status = 1
+    except OSError as e:
+        logger.error('Unable to start parallel workers: %s' % e)
+        return 1
+    finally:
+        for worker in worker_list:
+            worker.stop()
+
+    run_log = merge_run_logs([os.path.join(worker.run_directory, 'run.json') for worker in worker_list])
+    if run_log is None:
+        logger.error('No worker wrote a run file.')
+        return 1
+    write_run_log(run_log)
+    meta = run_log['meta']
+    write_run_index({'duration': meta['total_time'],
+                     'failed': meta['failed'] + meta['errors'],
+                     'id': PathManager.get_run_id(),
+                     'locale': args.locale,
+                     'target': args.application,
+                     'total': meta['total']})
+    logger.info('Parallel run of %s tests finished in %.1f seconds: %s passed, %s failed, %s skipped, %s errors.'
+                % (meta['total'], time.time() - start_time, meta['passed'], meta['failed'], meta['skipped'],
+                   meta['errors']))
+    return exit_status
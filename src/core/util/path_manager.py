@@ -28,8 +28,11 @@ def __create_tempdir():
     return temp_dir
 
 
+RUN_ID_VARIABLE = 'IRIS_RUN_ID'
+WORKER_ID_VARIABLE = 'IRIS_WORKER_ID'
+
 _tmp_dir = __create_tempdir()
-_run_id = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
+_run_id = os.environ.get(RUN_ID_VARIABLE) or datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
 _current_module = os.path.join(os.path.expanduser('~'), 'temp', 'test')
 args = get_core_args()
 
@@ -67,9 +70,15 @@ class PathManager:
 
     @staticmethod
     def get_current_run_dir():
-        """Returns the directory inside the working directory of the active run."""
+        """Returns the directory inside the working directory of the active run.
+
+        Workers of a parallel run each use a subdirectory of the run directory.
+        """
         PathManager.create_run_directory()
-        return os.path.join(args.workdir, 'runs', PathManager.get_run_id())
+        run_directory = os.path.join(args.workdir, 'runs', PathManager.get_run_id())
+        if PathManager.get_worker_id() is not None:
+            return os.path.join(run_directory, PathManager.get_worker_directory_name(PathManager.get_worker_id()))
+        return run_directory
 
     @staticmethod
     def get_log_file_path():
@@ -101,6 +110,16 @@ class PathManager:
         """Returns run id based on timestamp."""
         return _run_id
 
+    @staticmethod
+    def get_worker_id():
+        """Returns the index of this process in a parallel run, or None if tests run in a single process."""
+        return os.environ.get(WORKER_ID_VARIABLE)
+
+    @staticmethod
+    def get_worker_directory_name(worker_id):
+        """Returns the name of the run subdirectory of a parallel run worker."""
+        return 'worker_%s' % worker_id
+
     @staticmethod
     def get_images_path():
         """Returns images directory path."""
@@ -150,6 +169,10 @@ class PathManager:
         run_directory = os.path.join(master_run_directory, PathManager.get_run_id())
         if not os.path.exists(run_directory):
             os.mkdir(run_directory)
+        if PathManager.get_worker_id() is not None:
+            worker_directory = os.path.join(run_directory,
+                                            PathManager.get_worker_directory_name(PathManager.get_worker_id()))
+            os.makedirs(worker_directory, exist_ok=True)
 
     @staticmethod
     def get_run_directory():
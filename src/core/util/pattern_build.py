@@ -0,0 +1,173 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+import logging
+import multiprocessing
+import os
+import re
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.api.finder import pattern_cache
+from src.core.api.finder.pattern import load_pattern_image, parse_pattern_name
+from src.core.util.path_manager import PathManager
+
+logger = logging.getLogger(__name__)
+
+PATTERN_ROOTS = ('targets', 'tests')
+REFERENCE_ROOTS = ('src', 'targets', 'tests')
+EXCLUDED_DIRECTORIES = {'__pycache__', 'local_web'}
+MAX_LISTED_PATHS = 3
+IMAGE_REFERENCE = re.compile(r'[\'"]([^\'"\s/\\]+\.png)[\'"]')
+
+_PatternImage = namedtuple('_PatternImage', ['path', 'name', 'scale', 'owner'])
+
+
+def find_pattern_images() -> list:
+    """Lists the pattern images of all targets and tests.
+
+    Pattern images live in an `images` directory next to the module that uses them, inside targets/*/ or tests/*/.
+
+    :return: List of _PatternImage, with the logical image name, its scale factor and the directory of the modules
+    that own it.
+    """
+    images = []
+    for root in PATTERN_ROOTS:
+        for path, dirs, files in _walk(os.path.join(PathManager.get_module_dir(), root)):
+            parts = path.split(os.sep)
+            if 'images' not in parts:
+                continue
+            owner = os.sep.join(parts[:parts.index('images')])
+            for file_name in files:
+                if file_name.endswith('.png'):
+                    name, scale = parse_pattern_name(file_name)
+                    images.append(_PatternImage(os.path.join(path, file_name), name, scale, owner))
+    return images
+
+
+def find_image_references() -> dict:
+    """Collects the image file names written as string literals in Python modules.
+
+    Names built at runtime are not found, so images only used that way are reported as unused.
+
+    :return: Dictionary of module directory and set of referenced image names.
+    """
+    references = defaultdict(set)
+    for root in REFERENCE_ROOTS:
+        for path, dirs, files in _walk(os.path.join(PathManager.get_module_dir(), root)):
+            for file_name in files:
+                if not file_name.endswith('.py'):
+                    continue
+                try:
+                    with open(os.path.join(path, file_name), encoding='utf-8') as f:
+                        references[path].update(IMAGE_REFERENCE.findall(f.read()))
+                except (IOError, UnicodeDecodeError) as e:
+                    logger.debug('Unable to read %s: %s' % (os.path.join(path, file_name), e))
+    return references
+
+
+def _walk(directory: str):
+    for path, dirs, files in PathManager.sorted_walk(directory):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRECTORIES]
+        yield path, dirs, files
+
+
+def _build_image(image: _PatternImage):
+    """Adds an image to the pattern cache, unless identical contents are already there.
+
+    :return: Tuple of the image, its modification time and its digest. The digest is None if the image could not be
+    decoded.
+    """
+    mtime = os.stat(image.path).st_mtime_ns
+    digest = pattern_cache.get_file_digest(image.path, image.scale)
+    cache_file = os.path.join(pattern_cache.get_cache_dir(), digest)
+    if not pattern_cache.is_cached(cache_file):
+        rgb_array, gray_array, mask_array = load_pattern_image(image.path, image.scale)
+        if rgb_array is None:
+            return image, mtime, None
+        pattern_cache.save_arrays(cache_file, rgb_array, gray_array, mask_array)
+    return image, mtime, digest
+
+
+def build_patterns() -> dict:
+    """Preprocesses every pattern image into the pattern cache and checks where images are used.
+
+    The manifest written at the end lets test runs load the cached arrays instead of decoding and resizing images.
+
+    :return: Report dictionary with the lists of `invalid`, `unused`, `duplicate` and `misplaced` images.
+    """
+    images = find_pattern_images()
+    logger.info('Building %s pattern images.' % len(images))
+
+    with ThreadPoolExecutor(max_workers=multiprocessing.cpu_count()) as executor:
+        results = list(executor.map(_build_image, images))
+
+    entries = {}
+    invalid = []
+    by_digest = defaultdict(list)
+    for image, mtime, digest in results:
+        if digest is None:
+            invalid.append(image.path)
+            continue
+        entries[os.path.realpath(image.path)] = [mtime, digest]
+        by_digest[digest].append(image.path)
+    pattern_cache.manifest.save(entries)
+
+    references = find_image_references()
+    referenced_names = set().union(*references.values()) if len(references) > 0 else set()
+    owned_names = defaultdict(set)
+    paths_by_name = defaultdict(list)
+    for image in images:
+        owned_names[image.owner].add(image.name)
+        paths_by_name[image.name].append(image.path)
+
+    misplaced = []
+    for directory, names in sorted(references.items()):
+        for name in sorted(names):
+            if name not in owned_names[directory] and name in paths_by_name:
+                misplaced.append({'module_directory': directory, 'image': name, 'found': paths_by_name[name]})
+
+    return {
+        'invalid': invalid,
+        'unused': [image.path for image in images if image.name not in referenced_names],
+        'duplicate': [sorted(paths) for paths in by_digest.values() if len(paths) > 1],
+        'misplaced': misplaced
+    }
+
+
+def _log_report(report: dict):
+    module_dir = PathManager.get_module_dir()
+
+    def relative(path):
+        return os.path.relpath(path, module_dir)
+
+    for path in report['invalid']:
+        logger.error('Unable to decode image: %s' % relative(path))
+    for path in report['unused']:
+        logger.info('Unused image: %s' % relative(path))
+    for paths in report['duplicate']:
+        logger.info('Identical images: %s' % ', '.join(relative(path) for path in paths))
+    for entry in report['misplaced']:
+        found = ', '.join(relative(path) for path in entry['found'][:MAX_LISTED_PATHS])
+        if len(entry['found']) > MAX_LISTED_PATHS:
+            found += ' and %s more' % (len(entry['found']) - MAX_LISTED_PATHS)
+        logger.warning('Image %s used by modules in %s is only found at: %s'
+                       % (entry['image'], relative(entry['module_directory']), found))
+    logger.info('%s invalid, %s unused, %s duplicate groups, %s misplaced images.'
+                % (len(report['invalid']), len(report['unused']), len(report['duplicate']), len(report['misplaced'])))
+
+
+def run_patterns_command(command: str) -> int:
+    """Runs `iris patterns <command>`.
+
+    :param command: Only `build` is supported.
+    :return: Exit status.
+    """
+    if command != 'build':
+        logger.error('Unknown patterns command: %s. Usage: iris patterns build' % command)
+        return 1
+    report = build_patterns()
+    _log_report(report)
+    return 1 if len(report['invalid']) > 0 else 0
@@ -7,6 +7,7 @@ import logging
 import os
 import shutil
 import subprocess
+import tempfile
 from distutils import dir_util
 from distutils.spawn import find_executable
 from enum import Enum
@@ -108,39 +109,35 @@ class FirefoxProfile:
         :return:
         """
         staged_profiles = os.path.join(PathManager.get_module_dir(), 'targets', 'firefox', 'firefox_app', 'profiles')
+        # Parallel workers stage the same profiles at the same time, so each extraction gets its own directory.
+        staging_directory = tempfile.mkdtemp(prefix='staged_profile_', dir=PathManager.get_current_run_dir())
 
         sz_bin = find_executable('7z')
         logger.debug('Using 7zip executable at "%s"' % sz_bin)
 
         zipped_profile = os.path.join(staged_profiles, '%s.zip' % profile_name.value)
 
-        cmd = [sz_bin, 'x', '-y', '-bd', '-o%s' % staged_profiles, zipped_profile]
+        cmd = [sz_bin, 'x', '-y', '-bd', '-o%s' % staging_directory, zipped_profile]
         logger.debug('Unzipping profile with command "%s"' % ' '.join(cmd))
         try:
             output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
         except subprocess.CalledProcessError as e:
             logger.error('7zip failed: %s' % repr(e.output))
+            shutil.rmtree(staging_directory, ignore_errors=True)
             raise Exception('Unable to unzip profile.')
         logger.debug('7zip succeeded: %s' % repr(output))
 
-        from_directory = os.path.join(staged_profiles, profile_name.value)
+        from_directory = os.path.join(staging_directory, profile_name.value)
         to_directory = path
         logger.debug('Creating new profile: %s' % to_directory)
 
         dir_util.copy_tree(from_directory, to_directory)
 
         try:
-            shutil.rmtree(from_directory)
-        except WindowsError:
+            shutil.rmtree(staging_directory)
+        except OSError:
             logger.debug('Error, can\'t remove orphaned directory, leaving in place.')
 
-        resource_fork_folder = os.path.join(staged_profiles, '__MACOSX')
-        if os.path.exists(resource_fork_folder):
-            try:
-                shutil.rmtree(resource_fork_folder)
-            except WindowsError:
-                logger.debug('Error, can\'t remove orphaned directory, leaving in place.')
-
         return to_directory
 
     @staticmethod